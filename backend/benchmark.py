@@ -0,0 +1,597 @@
+"""
+Offline Benchmark Harness
+-------------------------
+Replays recorded nba_api responses from fixture files through a local
+stand-in for nba_api's HTTP client, with configurable artificial latency,
+and measures the hot paths at league scale: end-to-end slate throughput,
+team trends, bulk player data, feature building and simulation.
+
+Each case runs in its own subprocess against a fresh working directory
+(empty response cache and game log store), so its peak memory (max RSS) is
+measured in isolation. Per-function latencies
+come from the run metrics. Every run is appended to a JSONL results file
+and compared with the previous run.
+
+Fixtures are either generated (a synthetic league of 500 players, 30 teams
+and 82 games per team, in the exact response format of each endpoint) or
+recorded from the real API with --record. Replaying needs no network.
+
+Usage:
+    python benchmark.py --generate-fixtures [--players 500] [--games 82]
+    python benchmark.py [--cases slate team_trends all_players features simulation season_stats]
+                        [--latency 0.05] [--jitter 0.02] [--workers 8] [--repeat 5]
+    python benchmark.py --record --cases slate team_trends   # online, saves real responses
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+DEFAULT_FIXTURES_DIR = os.environ.get("NBA_BENCHMARK_FIXTURES", "benchmark_fixtures")
+DEFAULT_RESULTS_PATH = os.environ.get("NBA_BENCHMARK_RESULTS", "benchmark_results.jsonl")
+DEFAULT_LATENCY = 0.05
+DEFAULT_JITTER = 0.02
+DEFAULT_REPEAT = 5
+SEASON = "2023-24"
+SEASON_START = datetime(2023, 10, 24)
+CASES = ('slate', 'team_trends', 'all_players', 'features', 'simulation', 'season_stats')
+
+# Request parameters that identify a recorded response; the rest (league,
+# season type, date ranges of incremental syncs...) do not change it.
+KEY_PARAMS = ('PlayerID', 'TeamID', 'Season', 'PlayerOrTeam', 'GameDate')
+
+
+def fixture_key(parameters):
+    """Key of a recorded response among the responses of its endpoint."""
+    parameters = dict(parameters)
+    return "|".join(f"{name}={parameters[name]}" for name in KEY_PARAMS if parameters.get(name) not in (None, ''))
+
+
+def fixture_file(fixtures_dir, endpoint):
+    return os.path.join(fixtures_dir, re.sub(r'[^a-z0-9]+', '_', endpoint.lower()).strip('_') + ".json")
+
+
+class FixtureReplayer:
+    """
+    Stand-in for nba_api's HTTP client.
+
+    Replays the response recorded for each request after sleeping the
+    artificial latency, or, with `record=True`, forwards requests to the
+    real API and saves the responses as fixtures.
+    """
+
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, latency=DEFAULT_LATENCY, jitter=DEFAULT_JITTER,
+                 record=False, seed=None):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.record = record
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._fixtures = {}
+
+    def responses(self, endpoint):
+        """Return the recorded responses of an endpoint, keyed by fixture_key."""
+        endpoint = endpoint.lower()
+        with self._lock:
+            if endpoint not in self._fixtures:
+                path = fixture_file(self.fixtures_dir, endpoint)
+                if os.path.exists(path):
+                    with open(path) as f:
+                        self._fixtures[endpoint] = json.load(f)
+                else:
+                    self._fixtures[endpoint] = {}
+            return self._fixtures[endpoint]
+
+    def install(self):
+        """Route every nba_api request through this replayer."""
+        from nba_api.library.http import NBAHTTP
+
+        send_api_request = NBAHTTP.send_api_request
+        replayer = self
+
+        def replay_send(http, endpoint, parameters, *args, **kwargs):
+            key = fixture_key(parameters)
+            if replayer.record:
+                response = send_api_request(http, endpoint, parameters, *args, **kwargs)
+                with replayer._lock:
+                    replayer.requests += 1
+                replayer.responses(endpoint)[key] = response.get_response()
+                return response
+
+            contents = replayer.responses(endpoint).get(key)
+            if contents is None:
+                raise KeyError(f"Sem fixture para {endpoint} [{key}]")
+            delay = replayer.latency + replayer._random.uniform(-replayer.jitter, replayer.jitter)
+            time.sleep(max(0.0, delay))
+            with replayer._lock:
+                replayer.requests += 1
+            return http.nba_response(response=contents, status_code=200, url=f"fixture://{endpoint}?{key}")
+
+        NBAHTTP.send_api_request = replay_send
+
+    def save(self):
+        """Write the recorded responses to the fixtures directory."""
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        for endpoint, responses in self._fixtures.items():
+            with open(fixture_file(self.fixtures_dir, endpoint), 'w') as f:
+                json.dump(responses, f)
+
+    def frames(self, endpoint, data_set):
+        """Load every recorded response of an endpoint's data set into one DataFrame."""
+        import pandas as pd
+
+        frames = []
+        for contents in self.responses(endpoint).values():
+            for result_set in json.loads(contents)['resultSets']:
+                if result_set['name'] == data_set:
+                    frames.append(pd.DataFrame(result_set['rowSet'], columns=result_set['headers']))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _stats_response(endpoint_class, rows, parameters):
+    """Build a stats.nba.com response with every data set the endpoint expects."""
+    result_sets = [
+        {'name': name, 'headers': headers,
+         'rowSet': [[row.get(header) for header in headers] for row in rows.get(name, [])]}
+        for name, headers in endpoint_class.expected_data.items()
+    ]
+    return json.dumps({'resource': endpoint_class.endpoint, 'parameters': parameters, 'resultSets': result_sets})
+
+
+def generate_fixtures(fixtures_dir=DEFAULT_FIXTURES_DIR, n_players=500, n_games=82, seed=0):
+    """
+    Generate fixtures for a synthetic league: the 30 NBA teams, `n_players`
+    active players spread over their rosters and `n_games` games per team.
+    """
+    import numpy as np
+    from nba_api.live.nba.endpoints import scoreboard
+    from nba_api.stats.endpoints import (commonplayerinfo, commonteamroster, leaguedashplayerstats,
+                                         leaguedashteamstats, leaguegamelog, playergamelog)
+    from nba_api.stats.static import players, teams
+
+    rng = np.random.default_rng(seed)
+    nba_teams = sorted(teams.get_teams(), key=lambda team: team['id'])
+    active_players = sorted((player for player in players.get_players() if player['is_active']),
+                            key=lambda player: player['id'])
+    rostered = active_players[:n_players]
+    team_of = {player['id']: nba_teams[i % len(nba_teams)] for i, player in enumerate(rostered)}
+    positions = rng.choice(['G', 'F', 'C', 'G-F', 'F-C'], size=len(rostered))
+    position_of = {player['id']: str(position) for player, position in zip(rostered, positions)}
+
+    # Schedule: every round pairs up all teams, one game each, every other day
+    games = []
+    for round_number in range(n_games):
+        order = rng.permutation(len(nba_teams))
+        date = SEASON_START + timedelta(days=2 * round_number)
+        for k in range(0, len(order), 2):
+            home, away = nba_teams[order[k]], nba_teams[order[k + 1]]
+            home_pts, away_pts = (int(points) for points in rng.normal(113, 12, size=2).round())
+            if home_pts == away_pts:
+                home_pts += 1
+            games.append({'game_id': f"00223{len(games) + 1:05d}", 'date': date,
+                          'home': home, 'away': away, 'home_pts': home_pts, 'away_pts': away_pts})
+
+    team_rows = []
+    for game in games:
+        for team, opponent, pts, opp_pts, at in ((game['home'], game['away'], game['home_pts'], game['away_pts'], 'vs.'),
+                                                 (game['away'], game['home'], game['away_pts'], game['home_pts'], '@')):
+            team_rows.append({
+                'SEASON_ID': '22023', 'TEAM_ID': team['id'], 'TEAM_ABBREVIATION': team['abbreviation'],
+                'TEAM_NAME': team['full_name'], 'GAME_ID': game['game_id'],
+                'GAME_DATE': game['date'].strftime('%Y-%m-%d'),
+                'MATCHUP': f"{team['abbreviation']} {at} {opponent['abbreviation']}",
+                'WL': 'W' if pts > opp_pts else 'L', 'MIN': 240, 'PTS': pts, 'PLUS_MINUS': pts - opp_pts,
+            })
+    team_games = {}
+    for row in team_rows:
+        team_games.setdefault(row['TEAM_ID'], []).append(row)
+
+    responses = {'playergamelog': {}, 'commonteamroster': {}, 'commonplayerinfo': {}, 'leaguegamelog': {},
+                 'leaguedashplayerstats': {}, 'leaguedashteamstats': {}}
+    player_season_rows = []
+    for player in rostered:
+        team = team_of[player['id']]
+        means = rng.gamma(2.0, [6.0, 2.5, 1.5])
+        rows = []
+        for game in team_games[team['id']]:
+            if rng.random() < 0.1:
+                continue
+            pts, reb, ast = (int(value) for value in rng.poisson(means))
+            fga = max(1, int(pts / 1.2 + rng.integers(0, 5)))
+            fgm = min(fga, max(0, int(round(fga * rng.uniform(0.35, 0.55)))))
+            rows.append({
+                'SEASON_ID': '22023', 'Player_ID': player['id'], 'Game_ID': game['GAME_ID'],
+                'GAME_DATE': datetime.strptime(game['GAME_DATE'], '%Y-%m-%d').strftime('%b %d, %Y').upper(),
+                'MATCHUP': game['MATCHUP'], 'WL': game['WL'], 'MIN': int(rng.integers(10, 40)),
+                'FGM': fgm, 'FGA': fga, 'FG_PCT': round(fgm / fga, 3), 'REB': reb, 'AST': ast, 'PTS': pts,
+                'VIDEO_AVAILABLE': 1,
+            })
+        if rows:
+            season_row = {column: round(sum(row[column] for row in rows) / len(rows), 1)
+                          for column in ('MIN', 'FGM', 'FGA', 'REB', 'AST', 'PTS')}
+            season_row.update({
+                'PLAYER_ID': player['id'], 'PLAYER_NAME': player['full_name'], 'TEAM_ID': team['id'],
+                'TEAM_ABBREVIATION': team['abbreviation'], 'GP': len(rows),
+                'FG_PCT': round(season_row['FGM'] / season_row['FGA'], 3) if season_row['FGA'] else 0.0,
+            })
+            player_season_rows.append(season_row)
+        rows.reverse()  # the API lists the most recent game first
+        parameters = {'PlayerID': player['id'], 'Season': SEASON}
+        responses['playergamelog'][fixture_key(parameters)] = _stats_response(
+            playergamelog.PlayerGameLog, {'PlayerGameLog': rows}, parameters)
+
+    for team in nba_teams:
+        roster = [{
+            'TeamID': team['id'], 'SEASON': SEASON[:4], 'LeagueID': '00',
+            'PLAYER': player['full_name'], 'NUM': str(i), 'POSITION': position_of[player['id']],
+            'PLAYER_ID': player['id'],
+        } for i, player in enumerate(p for p in rostered if team_of[p['id']] is team)]
+        parameters = {'TeamID': team['id'], 'Season': SEASON}
+        responses['commonteamroster'][fixture_key(parameters)] = _stats_response(
+            commonteamroster.CommonTeamRoster, {'CommonTeamRoster': roster}, parameters)
+
+    for i, player in enumerate(active_players):
+        team = team_of.get(player['id'], {})
+        info = {
+            'PERSON_ID': player['id'], 'FIRST_NAME': player['first_name'], 'LAST_NAME': player['last_name'],
+            'DISPLAY_FIRST_LAST': player['full_name'], 'JERSEY': str(i % 100),
+            'POSITION': position_of.get(player['id'], 'G'), 'TEAM_ID': team.get('id', 0),
+            'TEAM_NAME': team.get('nickname', ''), 'TEAM_ABBREVIATION': team.get('abbreviation', ''),
+            'TEAM_CITY': team.get('city', ''),
+        }
+        parameters = {'PlayerID': player['id']}
+        responses['commonplayerinfo'][fixture_key(parameters)] = _stats_response(
+            commonplayerinfo.CommonPlayerInfo, {'CommonPlayerInfo': [info]}, parameters)
+
+    parameters = {'PlayerOrTeam': 'T', 'Season': SEASON}
+    responses['leaguegamelog'][fixture_key(parameters)] = _stats_response(
+        leaguegamelog.LeagueGameLog, {'LeagueGameLog': team_rows[::-1]}, parameters)
+
+    team_season_rows = []
+    for team in nba_teams:
+        rows = team_games[team['id']]
+        wins = sum(row['WL'] == 'W' for row in rows)
+        team_season_rows.append({
+            'TEAM_ID': team['id'], 'TEAM_NAME': team['full_name'], 'GP': len(rows), 'W': wins,
+            'L': len(rows) - wins, 'W_PCT': round(wins / len(rows), 3),
+            'PTS': round(sum(row['PTS'] for row in rows) / len(rows), 1),
+            'PLUS_MINUS': round(sum(row['PLUS_MINUS'] for row in rows) / len(rows), 1),
+        })
+    parameters = {'Season': SEASON}
+    responses['leaguedashplayerstats'][fixture_key(parameters)] = _stats_response(
+        leaguedashplayerstats.LeagueDashPlayerStats, {'LeagueDashPlayerStats': player_season_rows}, parameters)
+    responses['leaguedashteamstats'][fixture_key(parameters)] = _stats_response(
+        leaguedashteamstats.LeagueDashTeamStats, {'LeagueDashTeamStats': team_season_rows}, parameters)
+
+    # Today's scoreboard: every team plays, so the slate covers the whole league
+    order = rng.permutation(len(nba_teams))
+    board_games = []
+    for k in range(0, len(order), 2):
+        home, away = nba_teams[order[k]], nba_teams[order[k + 1]]
+        board_games.append({
+            'gameId': f"00224{k // 2 + 1:05d}", 'gameStatus': 1, 'gameStatusText': '7:30 pm ET', 'period': 0,
+            'gameClock': '',
+            'homeTeam': {'teamId': home['id'], 'teamName': home['nickname'], 'teamTricode': home['abbreviation'],
+                         'score': 0},
+            'awayTeam': {'teamId': away['id'], 'teamName': away['nickname'], 'teamTricode': away['abbreviation'],
+                         'score': 0},
+        })
+    responses[scoreboard.ScoreBoard.endpoint_url.lower()] = {
+        '': json.dumps({'scoreboard': {'gameDate': datetime.now().strftime('%Y-%m-%d'), 'leagueId': '00',
+                                       'games': board_games}}),
+    }
+
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for endpoint, endpoint_responses in responses.items():
+        with open(fixture_file(fixtures_dir, endpoint), 'w') as f:
+            json.dump(endpoint_responses, f)
+    print(f"Fixtures geradas em {fixtures_dir}: {len(rostered)} jogadores, {len(nba_teams)} times, "
+          f"{n_games} jogos por time")
+
+
+class InMemoryFirestore:
+    """Minimal Firestore client (batch, collection, document) that keeps documents in a dict."""
+
+    def __init__(self):
+        self.documents = {}
+
+    def collection(self, name):
+        class Collection:
+            def document(self, doc_id):
+                return (name, doc_id)
+
+        return Collection()
+
+    def batch(self):
+        client = self
+
+        class Batch:
+            def __init__(self):
+                self.operations = []
+
+            def set(self, reference, data, merge=False):
+                self.operations.append((reference, data))
+
+            def commit(self):
+                client.documents.update(self.operations)
+
+        return Batch()
+
+
+def _median_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def bench_slate(P, replayer, args):
+    """End-to-end predictions for every rostered player in today's games."""
+    start = time.perf_counter()
+    predictions = P.predict_slate(season=SEASON, workers=args.workers, rps=0, retries=0, simulate=args.simulate)
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'players': len(predictions), 'players_per_second': len(predictions) / elapsed}
+
+
+def bench_team_trends(P, replayer, args):
+    """League trends from one league game log, and per-team lookups."""
+    start = time.perf_counter()
+    trends = P.get_league_team_trends(SEASON)
+    cold = time.perf_counter() - start
+    games_df = P.get_league_games(SEASON)
+    team_ids = list(trends)
+    return {
+        'cold_seconds': cold,
+        'teams': len(trends),
+        'compute_seconds': _median_time(lambda: P.compute_team_trends(games_df), args.repeat),
+        'all_teams_lookup_seconds': _median_time(
+            lambda: [P.get_team_trends(team_id, SEASON) for team_id in team_ids], args.repeat),
+    }
+
+
+def bench_all_players(P, replayer, args):
+    """Bulk player data for every active player, written as streaming JSON."""
+    start = time.perf_counter()
+    count = P.generate_all_players_data(workers=args.workers, rps=0, retries=0)
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'players': count, 'players_per_second': count / elapsed}
+
+
+def _upcoming_frame(logs):
+    import pandas as pd
+
+    player_ids = logs['Player_ID'].unique()
+    return pd.DataFrame({'PLAYER_ID': player_ids, 'OPPONENT': 'BOS', 'IS_HOME': True,
+                         'GAME_DATE': datetime.now().strftime('%Y-%m-%d')})
+
+
+def bench_features(P, replayer, args):
+    """Features and expected stats for every player in one pass."""
+    logs = replayer.frames('playergamelog', 'PlayerGameLog')
+    upcoming = _upcoming_frame(logs)
+    return {
+        'players': len(upcoming),
+        'games': len(logs),
+        'seconds': _median_time(lambda: P.get_players_history(logs, upcoming), args.repeat),
+    }
+
+
+def bench_simulation(P, replayer, args):
+    """Monte Carlo simulation of every player's next game."""
+    logs = replayer.frames('playergamelog', 'PlayerGameLog')
+    histories = P.get_players_history(logs, _upcoming_frame(logs))
+    return {
+        'players': len(histories),
+        'simulations': args.sims,
+        'seconds': _median_time(lambda: P.simulate_players(logs, histories, n_sims=args.sims), args.repeat),
+    }
+
+
+def bench_season_stats(P, replayer, args):
+    """League-wide season stats of every player and team, one request per season."""
+    start = time.perf_counter()
+    player_stats = P.get_league_player_season_stats([SEASON], workers=args.workers, rps=0, retries=0)
+    team_stats = P.get_league_team_season_stats([SEASON], workers=args.workers, rps=0, retries=0)
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'players': len(player_stats), 'teams': len(team_stats)}
+
+
+BENCHMARKS = {
+    'slate': bench_slate,
+    'team_trends': bench_team_trends,
+    'all_players': bench_all_players,
+    'features': bench_features,
+    'simulation': bench_simulation,
+    'season_stats': bench_season_stats,
+}
+
+
+def _stage_summary(snapshot):
+    """Per-function call counts and total seconds from the run metrics."""
+    summary = {}
+    for histogram in snapshot['histograms']:
+        labels = histogram['labels']
+        if histogram['name'] == 'nba_stage_seconds':
+            name = f"stage:{labels['stage']}"
+        elif histogram['name'] == 'nba_api_call_seconds':
+            name = f"api:{labels['endpoint']}"
+        else:
+            continue
+        summary[name] = {'calls': histogram['count'], 'seconds': histogram['sum'],
+                         'mean_seconds': histogram['sum'] / histogram['count'] if histogram['count'] else 0.0}
+    return summary
+
+
+def run_case(name, args):
+    """Run one benchmark case in this process and return its results."""
+    fixtures_dir = os.path.abspath(args.fixtures)
+    workdir = tempfile.mkdtemp(prefix=f"nba_bench_{name}_")
+    os.chdir(workdir)
+
+    import nba_predictor as P
+    from metrics import get_metrics, install_http_hook
+
+    replayer = FixtureReplayer(fixtures_dir, latency=args.latency, jitter=args.jitter, record=args.record,
+                               seed=args.seed)
+    replayer.install()
+    install_http_hook()
+
+    P.configure_cache(os.path.join(workdir, "cache.sqlite3"))
+    P.configure_store(os.path.join(workdir, "gamelogs.sqlite3"))
+    P.configure_models(os.path.join(workdir, "models.pkl"))
+    P.configure_matchups(os.path.join(workdir, "matchups"))
+    P.configure_schedule(os.path.join(workdir, "schedule.json"))
+    P.configure_firestore(True)
+    P._db = InMemoryFirestore()
+    get_metrics().reset()
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            result = BENCHMARKS[name](P, replayer, args)
+        finally:
+            sys.stdout = stdout
+    if args.record:
+        replayer.save()
+
+    result.update({
+        'api_requests': replayer.requests,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'baseline_rss_mb': baseline_rss / 1024,
+        'functions': _stage_summary(get_metrics().snapshot()),
+    })
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_previous(path):
+    """Return the last stored benchmark run, or None."""
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def _format_value(value):
+    return f"{value:.4f}" if isinstance(value, float) else str(value)
+
+
+def compare(previous, current):
+    """Print each top-level measurement next to the previous run's value."""
+    for name, result in current['cases'].items():
+        print(f"\n{name}:")
+        before = (previous or {}).get('cases', {}).get(name, {})
+        for metric, value in result.items():
+            if not isinstance(value, (int, float)):
+                continue
+            line = f"  {metric}: {_format_value(value)}"
+            old = before.get(metric)
+            if isinstance(old, (int, float)) and old:
+                line += f" (anterior: {_format_value(old)}, {100 * (value - old) / old:+.1f}%)"
+            print(line)
+
+
+def child_command(name, args):
+    command = [sys.executable, os.path.abspath(__file__), '--child', name,
+               '--fixtures', os.path.abspath(args.fixtures), '--latency', str(args.latency),
+               '--jitter', str(args.jitter), '--workers', str(args.workers), '--repeat', str(args.repeat),
+               '--sims', str(args.sims), '--seed', str(args.seed)]
+    if args.record:
+        command.append('--record')
+    if args.simulate:
+        command.append('--simulate')
+    return command
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline do backend com fixtures do nba_api")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="diretório das fixtures")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH, help="arquivo JSONL com o histórico de execuções")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY,
+                        help="latência artificial por requisição, em segundos")
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER, help="variação máxima da latência")
+    parser.add_argument("--workers", type=int, default=8, help="requisições simultâneas")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="repetições das medições por função (mediana)")
+    parser.add_argument("--sims", type=int, default=10000, help="jogos simulados por jogador")
+    parser.add_argument("--simulate", action="store_true", help="inclui a simulação no caso slate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--generate-fixtures", action="store_true", help="gera fixtures de uma liga sintética")
+    parser.add_argument("--players", type=int, default=500, help="jogadores da liga sintética")
+    parser.add_argument("--games", type=int, default=82, help="jogos por time da liga sintética")
+    parser.add_argument("--record", action="store_true",
+                        help="usa a API real e grava as respostas como fixtures (requer rede)")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        print(json.dumps(run_case(args.child, args)))
+        return 0
+    if args.generate_fixtures:
+        generate_fixtures(args.fixtures, n_players=args.players, n_games=args.games, seed=args.seed)
+        return 0
+    if args.record:
+        args.latency = args.jitter = 0.0
+
+    run = {
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'commit': _git_commit(),
+        'config': {'latency': args.latency, 'jitter': args.jitter, 'workers': args.workers,
+                   'repeat': args.repeat, 'sims': args.sims, 'simulate': args.simulate, 'fixtures': args.fixtures},
+        'cases': {},
+    }
+    failed = False
+    for name in args.cases:
+        print(f"Executando benchmark {name}...")
+        process = subprocess.run(child_command(name, args), capture_output=True, text=True)
+        if process.returncode != 0:
+            print(f"Erro no benchmark {name}:\n{process.stderr}")
+            failed = True
+            continue
+        run['cases'][name] = json.loads(process.stdout.strip().splitlines()[-1])
+
+    if args.record:
+        print(f"Respostas gravadas em {args.fixtures}")
+        return 1 if failed else 0
+
+    previous = load_previous(args.results)
+    compare(previous, run)
+    with open(args.results, 'a') as f:
+        f.write(json.dumps(run) + "\n")
+    print(f"\nResultados salvos em {args.results}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Fetch Engine and Firestore Writer Checks
+----------------------------------------
+Runs the fetch engine against a local stub that fakes endpoint latency, with
+no network, and fails when its contract breaks: the number of retries and
+backoff sleeps, the requests-per-second spacing of rate_limited calls, the
+order of the results and the reporting of failed requests.
+
+The batched Firestore writer runs against benchmark.py's in-memory client:
+writes are split into batches of at most 500 operations, and a re-run skips
+every document whose content did not change.
+
+Usage:
+    python check_engines.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmark import InMemoryFirestore
+from fetch_engine import RateLimiter, call_with_retry, fetch_all, rate_limited
+from firestore_batch import BatchedWriter
+
+STUB_LATENCY = 0.02
+FIRESTORE_BATCH_LIMIT = 500  # operations per batch accepted by Firestore
+
+
+class FlakyStub:
+    """Fake endpoint that fails its first `failures` calls, then returns 'ok'."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("stub failure")
+        return "ok"
+
+
+def check_retries():
+    """Failed calls are retried `retries` times, with one backoff sleep before each retry."""
+    problems = []
+    sleeps = []
+    stub = FlakyStub(failures=2)
+    value = call_with_retry(stub, retries=3, backoff=1.0, max_backoff=4.0, sleep=sleeps.append)
+    if value != "ok" or stub.calls != 3 or len(sleeps) != 2:
+        problems.append(f"2 falhas com 3 tentativas extras: valor {value!r}, {stub.calls} chamadas, "
+                        f"{len(sleeps)} esperas (esperado 'ok', 3 e 2)")
+    if any(not 0 <= delay <= min(4.0, 2 ** attempt) for attempt, delay in enumerate(sleeps)):
+        problems.append(f"esperas fora do backoff exponencial: {sleeps}")
+
+    sleeps = []
+    stub = FlakyStub(failures=10)
+    try:
+        call_with_retry(stub, retries=2, sleep=sleeps.append)
+        problems.append("uma chamada que sempre falha não levantou a exceção")
+    except ConnectionError:
+        if stub.calls != 3 or len(sleeps) != 2:
+            problems.append(f"falha permanente com 2 tentativas extras: {stub.calls} chamadas e "
+                            f"{len(sleeps)} esperas (esperado 3 e 2)")
+    return problems
+
+
+def check_rate_limiter():
+    """RateLimiter hands out slots exactly 1/rate seconds apart."""
+    now = [0.0]
+    slots = []
+
+    def sleep(delay):
+        now[0] += delay
+
+    limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        limiter.acquire()
+        slots.append(now[0])
+    if slots != [0.0, 0.25, 0.5, 0.75, 1.0]:
+        return [f"intervalos do limitador a 4 req/s: {slots} (esperado [0.0, 0.25, 0.5, 0.75, 1.0])"]
+    return []
+
+
+def check_fetch_all():
+    """fetch_all spaces rate_limited calls, keeps input order and reports errors per item."""
+    problems = []
+    rps = 20
+    items = list(range(12))
+    rng = random.Random(0)
+    latencies = {item: rng.uniform(0, STUB_LATENCY) for item in items}
+
+    @rate_limited
+    def stub(item):
+        time.sleep(latencies[item])
+        if item == 7:
+            raise ValueError("stub failure")
+        return item * 10
+
+    start = time.monotonic()
+    results = list(fetch_all(stub, items, workers=8, rps=rps, retries=0))
+    elapsed = time.monotonic() - start
+
+    minimum = (len(items) - 1) / rps
+    if elapsed < minimum:
+        problems.append(f"{len(items)} requisições a {rps} req/s levaram {elapsed:.2f} s "
+                        f"(mínimo {minimum:.2f} s)")
+    if [result.item for result in results] != items:
+        problems.append(f"resultados fora de ordem: {[result.item for result in results]}")
+    for result in results:
+        if result.item == 7:
+            if result.error is None or result.value is not None:
+                problems.append("a requisição com falha não foi reportada no campo error")
+        elif result.error is not None or result.value != result.item * 10:
+            problems.append(f"item {result.item}: valor {result.value!r}, erro {result.error!r}")
+
+    # Calls that are not rate_limited (e.g. cache hits) never wait
+    start = time.monotonic()
+    list(fetch_all(lambda item: item, items, workers=8, rps=1, retries=0))
+    elapsed = time.monotonic() - start
+    if elapsed > 0.5:
+        problems.append(f"chamadas sem rate_limited esperaram o limitador ({elapsed:.2f} s)")
+    return problems
+
+
+def check_batched_writer(documents=1203):
+    """Writes go out in batches of at most 500, and unchanged documents are skipped on a re-run."""
+    problems = []
+    commits = []
+
+    class RecordingFirestore(InMemoryFirestore):
+        def batch(self):
+            batch = super().batch()
+            commit = batch.commit
+            batch.commit = lambda: (commits.append(len(batch.operations)), commit())
+            return batch
+
+    predictions = {str(i): {'jogador_id': i, 'pontos': f"{i % 40}.0"} for i in range(documents)}
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, "firestore_hashes.json")
+        db = RecordingFirestore()
+        writer = BatchedWriter(db, flush_interval=float('inf'), state_path=state_path)
+        for doc_id, data in predictions.items():
+            writer.set(doc_id, data)
+        writer.close()
+        full, rest = divmod(documents, FIRESTORE_BATCH_LIMIT)
+        expected = [FIRESTORE_BATCH_LIMIT] * full + ([rest] if rest else [])
+        if commits != expected or writer.written != documents or len(db.documents) != documents:
+            problems.append(f"{documents} gravações: lotes {commits}, {writer.written} gravadas, "
+                            f"{len(db.documents)} no Firestore (esperado lotes {expected})")
+
+        # A new run with the saved hashes writes only the changed documents
+        commits.clear()
+        predictions['0'] = dict(predictions['0'], pontos="99.0")
+        writer = BatchedWriter(db, flush_interval=float('inf'), state_path=state_path)
+        for doc_id, data in predictions.items():
+            writer.set(doc_id, data)
+        writer.close()
+        if writer.written != 1 or writer.skipped != documents - 1 or commits != [1]:
+            problems.append(f"nova execução com 1 documento alterado: {writer.written} gravadas, "
+                            f"{writer.skipped} ignoradas, lotes {commits} "
+                            f"(esperado 1, {documents - 1} e [1])")
+        if db.documents[('previsoes', '0')]['pontos'] != "99.0":
+            problems.append("o documento alterado não foi regravado")
+    return problems
+
+
+CHECKS = (check_retries, check_rate_limiter, check_fetch_all, check_batched_writer)
+
+
+def main():
+    problems = []
+    for check in CHECKS:
+        try:
+            found = check()
+        except Exception as e:
+            found = [f"{check.__name__} levantou {e!r}"]
+        print(f"{check.__name__}: {'ok' if not found else 'falhou'}")
+        problems.extend(found)
+    for problem in problems:
+        print(f"Erro: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Import-Time Budget Check
+------------------------
+Measures `import nba_predictor` with `python -X importtime` and fails when
+the import takes longer than the budget or when a heavy dependency (pandas,
+numpy, scikit-learn, firebase_admin or the nba_api endpoint modules) is
+loaded at import time instead of by the code path that needs it.
+
+Usage:
+    python check_import_time.py [--budget-ms 200] [--module nba_predictor]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 200
+HEAVY_MODULES = (
+    'pandas',
+    'numpy',
+    'sklearn',
+    'firebase_admin',
+    'nba_api.stats.endpoints',
+    'nba_api.live.nba.endpoints',
+)
+
+
+def measure_import(module='nba_predictor'):
+    """Return the cumulative import time (microseconds) of every module loaded by `import module`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{result.stdout}{result.stderr}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def check_import_time(module='nba_predictor', budget_ms=DEFAULT_BUDGET_MS):
+    """Return a list of budget violations (empty when the import is within budget)."""
+    timings = measure_import(module)
+    elapsed_ms = timings.get(module, 0) / 1000
+    print(f"import {module}: {elapsed_ms:.1f} ms (orçamento: {budget_ms} ms)")
+
+    problems = []
+    if elapsed_ms > budget_ms:
+        problems.append(f"importação levou {elapsed_ms:.1f} ms, acima do orçamento de {budget_ms} ms")
+    for heavy in HEAVY_MODULES:
+        if heavy in timings:
+            problems.append(f"{heavy} é carregado na importação ({timings[heavy] / 1000:.1f} ms)")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica o orçamento de tempo de importação")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--module", default="nba_predictor")
+    args = parser.parse_args(argv)
+
+    problems = check_import_time(args.module, args.budget_ms)
+    for problem in problems:
+        print(f"Erro: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
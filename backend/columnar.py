@@ -0,0 +1,167 @@
+"""
+Columnar Stat Tables
+--------------------
+Compact on-disk tables for ingested stats: one .npy file per column next to
+a JSON schema. Integer columns are downcast to the smallest integer type and
+float columns to float32. Text columns such as team, matchup, result and
+game ID are dictionary-encoded as categoricals, and game dates are stored
+parsed as datetime64.
+
+Reads load only the requested columns, memory-mapped, so the multi-season
+history of the whole league can be held in one process at a fraction of the
+size of the DataFrames built from the API responses.
+
+Every write saves its arrays under file names of its own and then replaces
+the JSON manifest naming them in one atomic rename, so a reader that loaded
+a manifest always opens the arrays written with it. Array files are deleted
+two writes later, once no fresh manifest names them.
+"""
+
+import json
+import os
+import uuid
+
+SCHEMA_FILE = "schema.json"
+DATE_COLUMNS = ('GAME_DATE',)
+READ_ATTEMPTS = 3
+
+NUMERIC = "numeric"
+CATEGORY = "category"
+
+
+def compact_frame(df):
+    """
+    Return a copy of `df` with downcast numbers, categorical text columns and
+    GAME_DATE parsed to datetimes.
+    """
+    import numpy as np
+    import pandas as pd
+    from features import parse_game_dates
+
+    columns = {}
+    for name in df.columns:
+        column = df[name]
+        if name in DATE_COLUMNS:
+            columns[name] = parse_game_dates(column)
+        elif pd.api.types.is_bool_dtype(column) or pd.api.types.is_datetime64_any_dtype(column):
+            columns[name] = column
+        elif pd.api.types.is_integer_dtype(column):
+            columns[name] = pd.to_numeric(column, downcast='integer')
+        elif pd.api.types.is_float_dtype(column) or column.isna().all():
+            columns[name] = column.astype(np.float32)
+        else:
+            columns[name] = column.astype('category')
+    return pd.DataFrame(columns, index=df.index)
+
+
+def new_version():
+    """Return a token that makes the array file names of one write unique."""
+    return uuid.uuid4().hex[:12]
+
+
+def save_array(path, file_name, values):
+    """Save an array as a .npy file in directory `path`."""
+    import numpy as np
+
+    with open(os.path.join(path, file_name), 'wb') as f:
+        np.save(f, np.ascontiguousarray(values))
+
+
+def replace_manifest(path, manifest_file, manifest, files):
+    """
+    Atomically replace the manifest of directory `path` with `manifest`,
+    recording the array `files` it names.
+
+    The files of the previous manifest are kept, because a reader may have
+    loaded it and not yet opened them. Those of the one before are deleted.
+    """
+    manifest_path = os.path.join(path, manifest_file)
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    previous_files = previous.get('files', [])
+    manifest = dict(manifest, files=list(files), previous_files=previous_files)
+
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+    for file_name in set(previous.get('previous_files', [])) - set(files) - set(previous_files):
+        try:
+            os.remove(os.path.join(path, file_name))
+        except FileNotFoundError:
+            pass
+
+
+def write_table(df, path, metadata=None):
+    """
+    Compact a frame and save it as a columnar table in directory `path`.
+
+    Column files get names of their own and the schema naming them is
+    replaced last, so readers never see a mix of old and new columns.
+    """
+    df = compact_frame(df.reset_index(drop=True))
+    os.makedirs(path, exist_ok=True)
+    version = new_version()
+    schema = {'rows': len(df), 'columns': [], 'metadata': metadata or {}}
+    for name in df.columns:
+        column = df[name]
+        entry = {'name': name, 'file': f"{name}.{version}.npy"}
+        if column.dtype.name == 'category':
+            entry['kind'] = CATEGORY
+            entry['categories'] = column.cat.categories.tolist()
+            values = column.cat.codes.to_numpy()
+        else:
+            entry['kind'] = NUMERIC
+            values = column.to_numpy()
+        save_array(path, entry['file'], values)
+        schema['columns'].append(entry)
+
+    replace_manifest(path, SCHEMA_FILE, schema, [entry['file'] for entry in schema['columns']])
+
+
+def read_schema(path):
+    """Return the schema of a saved table, or None if there is none."""
+    schema_path = os.path.join(path, SCHEMA_FILE)
+    if not os.path.exists(schema_path):
+        return None
+    with open(schema_path) as f:
+        return json.load(f)
+
+
+def read_table(path, columns=None, mmap=True):
+    """
+    Load a saved table, only the given columns if `columns` is set.
+
+    With `mmap` the column arrays are memory-mapped read-only, so only the
+    pages that are actually used are read from disk. Columns missing from the
+    table are skipped. If the table is rewritten twice while it is being
+    read, the read starts over from the new schema.
+    """
+    import numpy as np
+    import pandas as pd
+
+    for attempt in range(READ_ATTEMPTS):
+        schema = read_schema(path)
+        if schema is None:
+            raise FileNotFoundError(f"no columnar table in {path}")
+        entries = {entry['name']: entry for entry in schema['columns']}
+        names = list(entries) if columns is None else [name for name in columns if name in entries]
+
+        data = {}
+        try:
+            for name in names:
+                entry = entries[name]
+                values = np.load(os.path.join(path, entry['file']), mmap_mode='r' if mmap else None)
+                if entry['kind'] == CATEGORY:
+                    data[name] = pd.Categorical.from_codes(values, categories=entry['categories'])
+                else:
+                    data[name] = values
+        except FileNotFoundError:
+            # Two newer writes replaced the schema meanwhile; read the current one
+            if attempt == READ_ATTEMPTS - 1:
+                raise
+            continue
+        return pd.DataFrame(data, index=pd.RangeIndex(schema['rows']), copy=False)
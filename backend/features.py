@@ -0,0 +1,212 @@
+"""
+Rolling Feature Engine
+----------------------
+Builds prediction features from the stacked game logs of many players in a
+single vectorized pass, with no per-player Python loops: rolling means and
+EWMA over the last N games, season-to-date averages, per-opponent
+averages, home/away splits and rest days.
+
+Every feature for a game is computed only from the player's earlier games of
+the same season, so the same matrix serves for training on several stacked
+seasons and for predicting upcoming games from the current season's log.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+STATS = ['PTS', 'REB', 'AST']
+WINDOWS = (5, 10)
+EWM_SPAN = 10
+MAX_REST_DAYS = 10
+
+FeatureSet = namedtuple("FeatureSet", ["keys", "matrix", "targets", "columns"])
+
+
+def feature_columns(stats=STATS, windows=WINDOWS):
+    """Return the feature matrix column names, in order."""
+    columns = []
+    for stat in stats:
+        columns += [f"{stat}_AVG_{window}" for window in windows]
+        columns += [f"{stat}_EWM", f"{stat}_SEASON_AVG", f"{stat}_VS_OPP", f"{stat}_VENUE"]
+    return columns + ['IS_HOME', 'REST_DAYS', 'GAMES_PLAYED']
+
+
+FEATURE_COLUMNS = feature_columns()
+
+
+def parse_game_dates(dates):
+    """Parse GAME_DATE values ('APR 14, 2024' or '2024-04-14') into datetimes."""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    parsed = pd.to_datetime(dates, format='%b %d, %Y', errors='coerce')
+    missing = parsed.isna() & dates.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(dates[missing], format='ISO8601')
+    return parsed
+
+
+def season_keys(df):
+    """
+    Season of each game: SEASON_ID when the logs have it, otherwise the year
+    the season started in, from GAME_DATE (seasons start in the autumn).
+    """
+    if 'SEASON_ID' in df:
+        return df['SEASON_ID'].astype(str).to_numpy()
+    dates = df['GAME_DATE']
+    return (dates.dt.year - (dates.dt.month < 8)).astype(str).to_numpy()
+
+
+def prepare_game_logs(logs):
+    """Normalize stacked PlayerGameLog frames and sort them by player and date."""
+    df = logs.rename(columns={'Player_ID': 'PLAYER_ID', 'Game_ID': 'GAME_ID'})
+    matchup = df['MATCHUP'].astype(str)
+    df = df.assign(
+        GAME_DATE=parse_game_dates(df['GAME_DATE']),
+        IS_HOME=~matchup.str.contains('@', regex=False),
+        OPPONENT=matchup.str[-3:],
+    )
+    return df.sort_values(['PLAYER_ID', 'GAME_DATE'], kind='stable').reset_index(drop=True)
+
+
+def _prior_group_mean(values, group_keys):
+    """Mean of each row's earlier rows within the same group (NaN if none)."""
+    frame = pd.DataFrame(values)
+    grouped = frame.groupby(group_keys, sort=False)
+    sums = grouped.cumsum().to_numpy() - values
+    counts = grouped.cumcount().to_numpy()
+    return sums / counts[:, None]
+
+
+def _compute_features(df, seasons, stats, windows, ewm_span):
+    n = len(df)
+    rows = np.arange(n)
+    player_ids = df['PLAYER_ID'].to_numpy()
+
+    # Rows are sorted by player and date, so each (player, season) log is a
+    # contiguous run. Index of each row's first game of the run and its
+    # position within it.
+    new_run = np.ones(n, dtype=bool)
+    new_run[1:] = (player_ids[1:] != player_ids[:-1]) | (seasons[1:] != seasons[:-1])
+    start = np.maximum.accumulate(np.where(new_run, rows, 0))
+    games_played = rows - start
+    run_ids = np.cumsum(new_run)
+
+    values = np.nan_to_num(df[stats].to_numpy(dtype=np.float64))
+    cumulative = np.vstack([np.zeros((1, len(stats))), np.cumsum(values, axis=0)])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        season_avg = (cumulative[rows] - cumulative[start]) / games_played[:, None]
+
+        rolling = []
+        for window in windows:
+            first = np.maximum(rows - window, start)
+            rolling.append((cumulative[rows] - cumulative[first]) / (rows - first)[:, None])
+
+        ewm = (pd.DataFrame(values).groupby(run_ids, sort=False)
+               .ewm(span=ewm_span).mean()
+               .reset_index(level=0, drop=True).sort_index().to_numpy())
+        prior_ewm = np.full_like(ewm, np.nan)
+        prior_ewm[1:] = ewm[:-1]
+        prior_ewm[new_run] = np.nan
+
+        vs_opponent = _prior_group_mean(values, [run_ids, df['OPPONENT'].to_numpy()])
+        venue = _prior_group_mean(values, [run_ids, df['IS_HOME'].to_numpy()])
+
+    # Fall back to the season average, then to zero, when there is no history
+    season_avg = np.nan_to_num(season_avg)
+    rolling = [np.where(np.isnan(r), season_avg, r) for r in rolling]
+    prior_ewm, vs_opponent, venue = (np.where(np.isnan(f), season_avg, f)
+                                     for f in (prior_ewm, vs_opponent, venue))
+
+    dates = df['GAME_DATE'].to_numpy(dtype='datetime64[D]')
+    rest_days = np.full(n, MAX_REST_DAYS, dtype=np.float64)
+    rest_days[1:] = (dates[1:] - dates[:-1]).astype(np.float64)
+    rest_days[new_run] = MAX_REST_DAYS
+    rest_days = np.clip(rest_days, 0, MAX_REST_DAYS)
+
+    matrix = np.empty((n, len(feature_columns(stats, windows))), dtype=np.float32)
+    column = 0
+    for j in range(len(stats)):
+        for r in rolling:
+            matrix[:, column] = r[:, j]
+            column += 1
+        for feature in (prior_ewm, season_avg, vs_opponent, venue):
+            matrix[:, column] = feature[:, j]
+            column += 1
+    matrix[:, column] = df['IS_HOME'].to_numpy()
+    matrix[:, column + 1] = rest_days
+    matrix[:, column + 2] = games_played
+    return matrix
+
+
+def build_features(logs, stats=STATS, windows=WINDOWS, ewm_span=EWM_SPAN):
+    """
+    Compute pre-game features for every game in the stacked logs.
+
+    Returns a FeatureSet whose `matrix` is a float32 array with one row per
+    game, `targets` holds the actual stats of that game and `keys` identifies
+    the player, game, date and opponent of each row.
+    """
+    df = prepare_game_logs(logs)
+    matrix = _compute_features(df, season_keys(df), stats, windows, ewm_span)
+    keys = df[['PLAYER_ID', 'GAME_ID', 'GAME_DATE', 'OPPONENT', 'IS_HOME']]
+    targets = df[stats].to_numpy(dtype=np.float32)
+    return FeatureSet(keys, matrix, targets, feature_columns(stats, windows))
+
+
+def build_upcoming_features(logs, upcoming, stats=STATS, windows=WINDOWS, ewm_span=EWM_SPAN):
+    """
+    Compute features for upcoming games from the players' game logs.
+
+    `upcoming` is a frame with PLAYER_ID, OPPONENT (team abbreviation),
+    IS_HOME and GAME_DATE columns, one row per player. Each upcoming game is
+    appended after the player's last logged game, in the same season, and
+    featurized in the same pass, so the result matches what build_features
+    would produce for it.
+    """
+    upcoming = upcoming.assign(
+        GAME_ID=None,
+        GAME_DATE=pd.to_datetime(upcoming['GAME_DATE']),
+        _UPCOMING=True,
+    )
+    history = prepare_game_logs(logs) if len(logs) else pd.DataFrame(columns=list(upcoming.columns))
+    history = history.assign(_UPCOMING=False, _SEASON=season_keys(history) if len(history) else None)
+    df = (pd.concat([history, upcoming], ignore_index=True)
+          .sort_values(['PLAYER_ID', 'GAME_DATE', '_UPCOMING'], kind='stable')
+          .reset_index(drop=True))
+    for stat in stats:
+        if stat not in df:
+            df[stat] = 0.0
+    df[stats] = df[stats].astype(np.float64)
+
+    # An upcoming game belongs to the season of the player's last logged game
+    seasons = df.groupby('PLAYER_ID', sort=False)['_SEASON'].ffill().to_numpy()
+    matrix = _compute_features(df, seasons, stats, windows, ewm_span)
+    mask = df['_UPCOMING'].to_numpy(dtype=bool)
+    keys = df.loc[mask, ['PLAYER_ID', 'GAME_ID', 'GAME_DATE', 'OPPONENT', 'IS_HOME']].reset_index(drop=True)
+    targets = np.full((int(mask.sum()), len(stats)), np.nan, dtype=np.float32)
+    return FeatureSet(keys, matrix[mask], targets, feature_columns(stats, windows))
+
+
+def monthly_splits(logs):
+    """
+    Aggregate stacked game logs by player and calendar month in one groupby.
+
+    Returns a frame with PLAYER_ID, MONTH (a monthly Period), GAMES, WINS,
+    PPG and FG_PCT, where FG_PCT is the month's total FGM over total FGA.
+    Rows are ordered by player and month.
+    """
+    df = prepare_game_logs(logs)
+    grouped = (df.assign(MONTH=df['GAME_DATE'].dt.to_period('M'), WIN=df['WL'].eq('W'))
+               .groupby(['PLAYER_ID', 'MONTH'], sort=True)
+               .agg(GAMES=('PTS', 'size'), WINS=('WIN', 'sum'), PTS=('PTS', 'sum'),
+                    FGM=('FGM', 'sum'), FGA=('FGA', 'sum'))
+               .reset_index())
+    fga = grouped['FGA'].to_numpy(dtype=np.float64)
+    return grouped.assign(
+        PPG=grouped['PTS'] / grouped['GAMES'],
+        FG_PCT=np.divide(grouped['FGM'].to_numpy(dtype=np.float64), fga,
+                         out=np.zeros(len(grouped)), where=fga > 0),
+    )[['PLAYER_ID', 'MONTH', 'GAMES', 'WINS', 'PPG', 'FG_PCT']]
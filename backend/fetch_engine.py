@@ -0,0 +1,125 @@
+"""
+Bounded-Concurrency Fetch Engine
+--------------------------------
+Runs many slow nba_api requests through a thread pool, with a global
+requests-per-second limit shared by every worker and per-request retries
+using exponential backoff with full jitter.
+
+The limit applies to the functions decorated with rate_limited, which are
+the ones that actually send a request. Response cache hits and reads from
+the local game log store never wait for it.
+
+The fetch function is passed in by the caller, so the engine can be driven
+by a local stub that fakes endpoint latency instead of stats.nba.com.
+"""
+
+import functools
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import get_metrics
+
+DEFAULT_WORKERS = 8
+DEFAULT_RPS = 5.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 30.0
+
+FetchResult = namedtuple("FetchResult", ["item", "value", "error"])
+
+_local = threading.local()
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls to at most `rate` per second."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self._interval = 1.0 / rate if rate else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        """Block until the caller may issue its next request."""
+        if not self.rate:
+            return
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        delay = slot - now
+        if delay > 0:
+            self._sleep(delay)
+
+
+def rate_limited(func):
+    """
+    Make each call wait for the rate limiter of the fetch_all worker running
+    it (calls made outside fetch_all are not limited). Decorate the function
+    that sends the request, under any cache, so cache hits never wait.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        limiter = getattr(_local, 'limiter', None)
+        if limiter is not None:
+            limiter.acquire()
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def backoff_delay(attempt, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF):
+    """Return a full-jitter delay for the given retry attempt (0-based)."""
+    return random.uniform(0, min(max_backoff, backoff * (2 ** attempt)))
+
+
+def call_with_retry(func, *args, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                    max_backoff=DEFAULT_MAX_BACKOFF, sleep=time.sleep, **kwargs):
+    """
+    Call func, retrying failures with exponential backoff and jitter. Rate
+    limiting is up to the rate_limited functions that func calls.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            if attempt >= retries:
+                get_metrics().inc("nba_fetch_failures_total")
+                raise
+            get_metrics().inc("nba_fetch_retries_total")
+            sleep(backoff_delay(attempt, backoff, max_backoff))
+            attempt += 1
+
+
+def fetch_all(func, items, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, retries=DEFAULT_RETRIES,
+              backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF):
+    """
+    Apply func to every item concurrently and yield FetchResult tuples.
+
+    Results are yielded in the same order as `items`, so callers produce the
+    same output as a sequential loop. A request that still fails after all
+    retries is reported through the `error` field instead of raising.
+    `rps` limits the rate_limited calls made by func, not the calls of func.
+    """
+    items = list(items)
+    limiter = RateLimiter(rps)
+
+    def run(item):
+        _local.limiter = limiter
+        try:
+            value = call_with_retry(func, item, retries=retries, backoff=backoff, max_backoff=max_backoff)
+            return FetchResult(item, value, None)
+        except Exception as e:
+            return FetchResult(item, None, e)
+        finally:
+            _local.limiter = None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for result in executor.map(run, items):
+            yield result
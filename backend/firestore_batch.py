@@ -0,0 +1,130 @@
+"""
+Batched Firestore Writer
+------------------------
+Groups document writes into Firestore batches of up to 500 operations,
+flushing when a batch is full or when the flush interval has elapsed.
+Documents whose content hash has not changed since they were last written
+are skipped, so re-running a slate only writes predictions that changed.
+
+The writer only uses `db.batch()` and `db.collection(...).document(...)`,
+so it runs unchanged against the Firestore emulator (set
+FIRESTORE_EMULATOR_HOST) or an in-memory fake client.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from metrics import get_metrics
+
+PREDICTIONS_COLLECTION = "previsoes"
+MATCHES_COLLECTION = "partidas"
+MAX_BATCH_SIZE = 500  # Firestore limit of operations per batch
+DEFAULT_FLUSH_INTERVAL = 5.0
+DEFAULT_STATE_PATH = os.environ.get("NBA_FIRESTORE_STATE_PATH", "firestore_hashes.json")
+
+
+def content_hash(data):
+    """Return a stable hash of a document's content."""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_hashes(path):
+    """Load the document hashes recorded by a previous run."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_hashes(path, hashes):
+    """Atomically save document hashes for the next run."""
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(hashes, f)
+    os.replace(tmp_path, path)
+
+
+class BatchedWriter:
+    """
+    Queue document writes and commit them to Firestore in batches.
+
+    With `merge=True` each write only updates the given fields of the
+    document instead of replacing it.
+    """
+
+    def __init__(self, db, collection=PREDICTIONS_COLLECTION, max_batch_size=MAX_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, state_path=DEFAULT_STATE_PATH,
+                 merge=False, clock=time.monotonic):
+        self.db = db
+        self.collection = collection
+        self.merge = merge
+        self.max_batch_size = min(max_batch_size, MAX_BATCH_SIZE)
+        self.flush_interval = flush_interval
+        self.state_path = state_path
+        self.written = 0
+        self.skipped = 0
+        self.commits = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._hashes = load_hashes(state_path)
+        self._last_flush = clock()
+
+    def set(self, doc_id, data):
+        """Queue a document write. Returns False if the content is unchanged."""
+        doc_id = str(doc_id)
+        digest = content_hash(data)
+        with self._lock:
+            pending = self._pending.get(doc_id)
+            if (pending[1] if pending else self._hashes.get(doc_id)) == digest:
+                self.skipped += 1
+                get_metrics().inc("nba_firestore_documents_total", collection=self.collection, result="skipped")
+                return False
+            self._pending[doc_id] = (data, digest)
+            if (len(self._pending) >= self.max_batch_size
+                    or self._clock() - self._last_flush >= self.flush_interval):
+                self._flush()
+        return True
+
+    def flush(self):
+        """Commit every queued write. Returns the number of documents written."""
+        with self._lock:
+            return self._flush()
+
+    def close(self):
+        """Flush the remaining writes."""
+        return self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _flush(self):
+        self._last_flush = self._clock()
+        if not self._pending:
+            return 0
+
+        batch = self.db.batch()
+        collection = self.db.collection(self.collection)
+        for doc_id, (data, _) in self._pending.items():
+            batch.set(collection.document(doc_id), data, merge=self.merge)
+        with get_metrics().timed("nba_firestore_commit_seconds", collection=self.collection):
+            batch.commit()
+
+        count = len(self._pending)
+        for doc_id, (_, digest) in self._pending.items():
+            self._hashes[doc_id] = digest
+        self._pending.clear()
+        self.written += count
+        self.commits += 1
+        get_metrics().inc("nba_firestore_documents_total", count, collection=self.collection, result="written")
+        save_hashes(self.state_path, self._hashes)
+        return count
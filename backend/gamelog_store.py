@@ -0,0 +1,204 @@
+"""
+Game Log Store
+--------------
+Local SQLite store for player and team game logs. For every player/team and
+season it records the last ingested GAME_ID and game date, so each refresh
+asks the API only for games played since then and appends the new ones.
+Reads are served from the store with no network access.
+
+Bulk reads of a whole kind (every player or every team) come from a
+compact columnar snapshot of the store (see columnar.py), rebuilt when new
+games have been appended since it was written.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_STORE_PATH = os.environ.get("NBA_GAMELOG_PATH", "nba_gamelogs.sqlite3")
+
+PLAYER = "player"
+TEAM = "team"
+
+
+def _game_id_column(games_df):
+    return 'Game_ID' if 'Game_ID' in games_df.columns else 'GAME_ID'
+
+
+class GameLogStore:
+    """Append-only game log store with per-entity ingestion state."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS games ("
+            " kind TEXT, entity_id INTEGER, season TEXT, game_id TEXT, game_date TEXT, payload TEXT,"
+            " PRIMARY KEY (kind, entity_id, season, game_id));"
+            "CREATE TABLE IF NOT EXISTS ingest_state ("
+            " kind TEXT, entity_id INTEGER, season TEXT, last_game_id TEXT, last_game_date TEXT,"
+            " games INTEGER, updated_at REAL,"
+            " PRIMARY KEY (kind, entity_id, season));"
+        )
+        self._conn.commit()
+
+    def state(self, kind, entity_id, season):
+        """Return the ingestion state of an entity's season, or None if never ingested."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_game_id, last_game_date, games, updated_at FROM ingest_state"
+                " WHERE kind = ? AND entity_id = ? AND season = ?",
+                (kind, int(entity_id), season),
+            ).fetchone()
+        if row is None:
+            return None
+        return {'last_game_id': row[0], 'last_game_date': row[1], 'games': row[2], 'updated_at': row[3]}
+
+    def needs_refresh(self, kind, entity_id, season, max_age):
+        """True if the entity was never ingested or its last refresh is older than max_age seconds."""
+        state = self.state(kind, entity_id, season)
+        return state is None or self._clock() - state['updated_at'] > max_age
+
+    def read(self, kind, entity_id, season):
+        """Return the stored game log, newest game first like the API."""
+        import pandas as pd
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM games WHERE kind = ? AND entity_id = ? AND season = ?"
+                " ORDER BY game_date DESC, game_id DESC",
+                (kind, int(entity_id), season),
+            ).fetchall()
+        return pd.DataFrame([json.loads(row[0]) for row in rows])
+
+    def _read_rows(self, kind, seasons=None):
+        query = "SELECT season, payload FROM games WHERE kind = ?"
+        params = [kind]
+        if seasons:
+            query += f" AND season IN ({', '.join('?' * len(seasons))})"
+            params += list(seasons)
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY entity_id, game_date DESC, game_id DESC", params).fetchall()
+
+    def read_all(self, kind, seasons=None):
+        """Return the stored games of every entity of a kind, optionally only for some seasons."""
+        import pandas as pd
+
+        return pd.DataFrame([json.loads(row[1]) for row in self._read_rows(kind, seasons)])
+
+    def columnar_path(self, kind):
+        """Directory of the columnar snapshot of a kind."""
+        return os.path.join(f"{self.path}.columns", kind)
+
+    def _games_count(self, kind):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM games WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def export_columns(self, kind):
+        """
+        Write the columnar snapshot of a kind if games were appended since the
+        last one. Adds a SEASON column with the season each game was stored
+        under. Returns True if the snapshot was rewritten.
+        """
+        import pandas as pd
+        from columnar import read_schema, write_table
+
+        games = self._games_count(kind)
+        path = self.columnar_path(kind)
+        schema = read_schema(path)
+        if schema is not None and schema['metadata'].get('games') == games:
+            return False
+        rows = self._read_rows(kind)
+        df = pd.DataFrame([json.loads(row[1]) for row in rows])
+        df['SEASON'] = [row[0] for row in rows]
+        write_table(df, path, metadata={'games': games, 'exported_at': self._clock()})
+        return True
+
+    def read_columns(self, kind, columns=None, seasons=None):
+        """
+        Return the stored games of every entity of a kind from the columnar
+        snapshot: only `columns` (all if None), with compact dtypes,
+        optionally only for some seasons. The snapshot is refreshed first if
+        it is out of date.
+        """
+        from columnar import read_table
+
+        self.export_columns(kind)
+        wanted = None if columns is None else list(columns) + (['SEASON'] if seasons and 'SEASON' not in columns else [])
+        df = read_table(self.columnar_path(kind), wanted)
+        if seasons:
+            df = df[df['SEASON'].isin(seasons)].reset_index(drop=True)
+            if columns is not None and 'SEASON' not in columns:
+                df = df.drop(columns='SEASON')
+        return df
+
+    def append(self, kind, entity_id, season, games_df):
+        """Store the games not seen before and update the ingestion state. Returns the number added."""
+        from features import parse_game_dates
+
+        records = json.loads(games_df.to_json(orient='records')) if len(games_df) else []
+        id_column = _game_id_column(games_df)
+        dates = (parse_game_dates(games_df['GAME_DATE']).dt.strftime('%Y-%m-%d').tolist()
+                 if len(games_df) else [])
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO games (kind, entity_id, season, game_id, game_date, payload)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(kind, int(entity_id), season, str(record[id_column]), date, json.dumps(record))
+                 for record, date in zip(records, dates)],
+            )
+            added = self._conn.total_changes - before
+            last = self._conn.execute(
+                "SELECT game_id, game_date, (SELECT COUNT(*) FROM games"
+                "  WHERE kind = ? AND entity_id = ? AND season = ?)"
+                " FROM games WHERE kind = ? AND entity_id = ? AND season = ?"
+                " ORDER BY game_date DESC, game_id DESC LIMIT 1",
+                (kind, int(entity_id), season) * 2,
+            ).fetchone() or (None, None, 0)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ingest_state"
+                " (kind, entity_id, season, last_game_id, last_game_date, games, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, int(entity_id), season, last[0], last[1], last[2], self._clock()),
+            )
+            self._conn.commit()
+        return added
+
+    def sync(self, kind, entity_id, season, fetch):
+        """
+        Fetch and append the games played since the last ingested one.
+
+        `fetch(date_from)` must return the entity's game log from that date
+        ('MM/DD/YYYY', inclusive) onwards, or the whole season for ''.
+        """
+        state = self.state(kind, entity_id, season)
+        date_from = ''
+        if state and state['last_game_date']:
+            year, month, day = state['last_game_date'].split('-')
+            date_from = f"{month}/{day}/{year}"
+        return self.append(kind, entity_id, season, fetch(date_from))
+
+
+_store = None
+_store_path = DEFAULT_STORE_PATH
+
+
+def configure_store(path=DEFAULT_STORE_PATH):
+    """Point the shared store at another file; it is opened on first use."""
+    global _store, _store_path
+    _store = None
+    _store_path = path
+
+
+def get_store():
+    """Return the shared store, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = GameLogStore(_store_path)
+    return _store
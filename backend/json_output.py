@@ -0,0 +1,87 @@
+"""
+Streaming JSON Output
+---------------------
+Writes records one at a time as they finish, so a long bulk run keeps flat
+memory and a crash near the end does not lose the work already done.
+
+Records are appended as NDJSON to `<path>.partial`. Finalizing either
+renames it to `path` (NDJSON output) or streams it into a JSON array with
+the same layout as `json.dump(records, f)`, written to a temp file and
+atomically renamed. A later run with `resume=True` keeps the records of a
+leftover partial file and reports their IDs so they can be skipped.
+"""
+
+import json
+import os
+
+
+class StreamingJsonWriter:
+    """Append records to a partial NDJSON file and atomically finalize it."""
+
+    def __init__(self, path, ndjson=False, resume=False, key='id'):
+        self.path = path
+        self.partial_path = f"{path}.partial"
+        self.ndjson = ndjson
+        self.key = key
+        self.count = 0
+        self.existing_ids = set()
+        if resume and os.path.exists(self.partial_path):
+            self._recover_partial()
+            self._file = open(self.partial_path, 'a')
+        else:
+            self._file = open(self.partial_path, 'w')
+
+    def write(self, record):
+        """Append one record and flush it to disk."""
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def finalize(self):
+        """Close the partial file and atomically move the finished output into place."""
+        self._file.close()
+        if self.ndjson:
+            os.replace(self.partial_path, self.path)
+            return
+
+        tmp_path = f"{self.path}.tmp"
+        with open(self.partial_path) as src, open(tmp_path, 'w') as dst:
+            dst.write("[")
+            for i, line in enumerate(src):
+                if i:
+                    dst.write(", ")
+                dst.write(line.rstrip("\n"))
+            dst.write("]")
+        os.replace(tmp_path, self.path)
+        os.remove(self.partial_path)
+
+    def close(self):
+        """Close the partial file without finalizing it, keeping it for a resumed run."""
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finalize()
+        else:
+            self.close()
+
+    def _recover_partial(self):
+        """Load the IDs of a leftover partial file, dropping a truncated last line."""
+        valid_size = 0
+        with open(self.partial_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.existing_ids.add(record.get(self.key))
+                self.count += 1
+                valid_size += len(line)
+        with open(self.partial_path, 'r+b') as f:
+            f.truncate(valid_size)
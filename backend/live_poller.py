@@ -0,0 +1,125 @@
+"""
+Live Scoreboard Poller
+----------------------
+Long-running poller for today's scoreboard. Each snapshot is diffed against
+the previous one by game ID, and only games whose score, period, clock or
+status changed are handed to the publishers. The polling interval adapts:
+fast while any game is live, slow when none are.
+"""
+
+import json
+import os
+import time
+
+LIVE_INTERVAL = 10
+IDLE_INTERVAL = 300
+GAME_STATUS_LIVE = 2  # gameStatus of the live scoreboard: 1 scheduled, 2 live, 3 final
+
+TRACKED_FIELDS = ('status', 'quarter', 'remainingTime')
+TEAM_SIDES = ('homeTeam', 'awayTeam')
+
+
+def is_live(match):
+    """True if the match is in progress."""
+    return match.get('status') == GAME_STATUS_LIVE
+
+
+def game_delta(previous, current):
+    """
+    Return the fields of a match that changed since the previous snapshot.
+
+    New matches are returned whole; unchanged matches give an empty dict.
+    """
+    if previous is None:
+        return current
+    delta = {field: current.get(field) for field in TRACKED_FIELDS
+             if current.get(field) != previous.get(field)}
+    for side in TEAM_SIDES:
+        score = current.get(side, {}).get('score')
+        if score != previous.get(side, {}).get('score'):
+            delta[side] = {'score': score}
+    return delta
+
+
+def diff_matches(previous, current):
+    """
+    Diff two snapshots keyed by game ID.
+
+    Returns (deltas, removed): the changed fields of each new or updated
+    game, and the IDs of games no longer on the scoreboard.
+    """
+    deltas = {}
+    for game_id, match in current.items():
+        delta = game_delta(previous.get(game_id), match)
+        if delta:
+            deltas[game_id] = delta
+    removed = [game_id for game_id in previous if game_id not in current]
+    return deltas, removed
+
+
+class JsonFilePublisher:
+    """Rewrite the matches JSON file atomically, only when something changed."""
+
+    def __init__(self, path='nba_matches.json'):
+        self.path = path
+        self.writes = 0
+
+    def __call__(self, matches, deltas):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(matches, f)
+        os.replace(tmp_path, self.path)
+        self.writes += 1
+
+
+class FirestorePublisher:
+    """Merge only the changed fields of each game into its Firestore document."""
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def __call__(self, matches, deltas):
+        for game_id, delta in deltas.items():
+            self.writer.set(game_id, delta)
+        self.writer.flush()
+
+
+def poll_scoreboard(fetch, publishers, live_interval=LIVE_INTERVAL, idle_interval=IDLE_INTERVAL,
+                    max_polls=None, sleep=time.sleep):
+    """
+    Poll `fetch()` for match snapshots and publish the changed games.
+
+    Runs until interrupted, or for `max_polls` snapshots. Returns the number
+    of game updates published.
+    """
+    previous = {}
+    polls = 0
+    published = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            try:
+                matches = fetch()
+            except Exception as e:
+                print(f"Erro ao consultar o placar: {e}")
+                matches = None
+
+            if matches is not None:
+                current = {match['id']: match for match in matches}
+                deltas, removed = diff_matches(previous, current)
+                if deltas or removed:
+                    for publish in publishers:
+                        try:
+                            publish(matches, deltas)
+                        except Exception as e:
+                            print(f"Erro ao publicar partidas: {e}")
+                    published += len(deltas)
+                    print(f"{len(deltas)} partidas atualizadas, {len(removed)} removidas")
+                previous = current
+
+            polls += 1
+            if max_polls is None or polls < max_polls:
+                live = any(is_live(match) for match in previous.values())
+                sleep(live_interval if live else idle_interval)
+    except KeyboardInterrupt:
+        print("Monitoramento do placar encerrado.")
+    return published
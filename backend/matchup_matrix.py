@@ -0,0 +1,161 @@
+"""
+Player vs Opponent Matchup Matrix
+---------------------------------
+Precomputes a dense player × opponent-team matrix of per-game averages and
+game counts from the ingested game logs, grouping each game on the opponent
+in its MATCHUP. The matrix is saved as .npy arrays next to a JSON file with
+the player and team ID index maps, and loaded memory-mapped, so a
+prediction reads one player's history against an opponent with an indexed
+lookup and no API call. Each save writes arrays of its own and swaps the
+index last (see columnar.replace_manifest), so a loaded index always matches
+its arrays.
+"""
+
+import json
+import os
+from datetime import datetime
+
+DEFAULT_MATCHUP_PATH = os.environ.get("NBA_MATCHUP_PATH", "nba_matchups")
+
+AVERAGES_FILE = "averages.npy"
+COUNTS_FILE = "counts.npy"
+INDEX_FILE = "index.json"
+# Game log columns the matrix is built from
+LOG_COLUMNS = ('Player_ID', 'Game_ID', 'GAME_DATE', 'MATCHUP', 'PTS', 'REB', 'AST')
+
+
+class MatchupMatrix:
+    """
+    Per-game averages (players, teams, stats) and game counts (players, teams)
+    with the maps from player ID and team ID to their row and column.
+    """
+
+    def __init__(self, averages, counts, player_ids, team_ids, stats, built_at=None):
+        self.averages = averages
+        self.counts = counts
+        self.player_ids = list(player_ids)
+        self.team_ids = list(team_ids)
+        self.stats = list(stats)
+        self.built_at = built_at
+        self._player_index = {player_id: i for i, player_id in enumerate(self.player_ids)}
+        self._team_index = {team_id: j for j, team_id in enumerate(self.team_ids)}
+
+    def lookup(self, player_id, team_id):
+        """
+        Return the player's games and per-game averages against a team, e.g.
+        {'games': 4, 'PTS': 27.5, 'REB': 8.0, 'AST': 7.2}, or None if they never met.
+        """
+        i = self._player_index.get(int(player_id))
+        j = self._team_index.get(int(team_id))
+        if i is None or j is None:
+            return None
+        games = int(self.counts[i, j])
+        if not games:
+            return None
+        result = {'games': games}
+        result.update(zip(self.stats, (float(value) for value in self.averages[i, j])))
+        return result
+
+    def save(self, path=DEFAULT_MATCHUP_PATH):
+        """Write the arrays under new file names, then atomically swap the index that names them."""
+        from columnar import new_version, replace_manifest, save_array
+
+        os.makedirs(path, exist_ok=True)
+        version = new_version()
+        arrays = {}
+        for name, array in ((AVERAGES_FILE, self.averages), (COUNTS_FILE, self.counts)):
+            arrays[name] = name.replace('.npy', f".{version}.npy")
+            save_array(path, arrays[name], array)
+
+        index = {
+            'player_ids': self.player_ids,
+            'team_ids': self.team_ids,
+            'stats': self.stats,
+            'built_at': self.built_at,
+            'arrays': arrays,
+        }
+        replace_manifest(path, INDEX_FILE, index, list(arrays.values()))
+
+    @classmethod
+    def load(cls, path=DEFAULT_MATCHUP_PATH):
+        """Open a saved matrix with its arrays memory-mapped read-only."""
+        import numpy as np
+        from columnar import READ_ATTEMPTS
+
+        for attempt in range(READ_ATTEMPTS):
+            with open(os.path.join(path, INDEX_FILE)) as f:
+                index = json.load(f)
+            arrays = index.get('arrays', {})
+            try:
+                averages = np.load(os.path.join(path, arrays.get(AVERAGES_FILE, AVERAGES_FILE)), mmap_mode='r')
+                counts = np.load(os.path.join(path, arrays.get(COUNTS_FILE, COUNTS_FILE)), mmap_mode='r')
+            except FileNotFoundError:
+                # Two newer saves replaced the index meanwhile; open the current one
+                if attempt == READ_ATTEMPTS - 1:
+                    raise
+                continue
+            return cls(averages, counts, index['player_ids'], index['team_ids'], index['stats'],
+                       index.get('built_at'))
+
+
+def build_matchup_matrix(logs, team_ids, stats=None):
+    """
+    Build the matchup matrix from stacked PlayerGameLog frames.
+
+    `team_ids` maps team abbreviations (as they appear in MATCHUP) to team
+    IDs; games against abbreviations not in it are ignored. Games repeated
+    across the input are counted once.
+    """
+    import numpy as np
+    import pandas as pd
+    from features import prepare_game_logs, STATS
+
+    stats = STATS if stats is None else stats
+    team_index = pd.Index(sorted(set(team_ids.values())))
+    if len(logs):
+        df = prepare_game_logs(logs).drop_duplicates(['PLAYER_ID', 'GAME_ID'])
+        columns = team_index.get_indexer(df['OPPONENT'].map(team_ids))
+        df = df[columns >= 0]
+        columns = columns[columns >= 0]
+    else:
+        df = pd.DataFrame(columns=['PLAYER_ID'] + list(stats))
+        columns = np.zeros(0, dtype=np.intp)
+
+    player_index = pd.Index(np.sort(df['PLAYER_ID'].unique()).astype(np.int64))
+    rows = player_index.get_indexer(df['PLAYER_ID'])
+    cells = rows * len(team_index) + columns
+    size = len(player_index) * len(team_index)
+    shape = (len(player_index), len(team_index))
+
+    counts = np.bincount(cells, minlength=size).reshape(shape)
+    values = df[list(stats)].to_numpy(dtype=np.float64)
+    sums = np.stack([np.bincount(cells, weights=values[:, k], minlength=size) for k in range(len(stats))], axis=1)
+    averages = sums.reshape(shape + (len(stats),)) / np.maximum(counts, 1)[:, :, None]
+
+    return MatchupMatrix(
+        averages.astype(np.float32),
+        counts.astype(np.int32),
+        player_index.tolist(),
+        team_index.tolist(),
+        stats,
+        built_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+_matrix = None
+_matrix_path = DEFAULT_MATCHUP_PATH
+
+
+def configure_matchups(path=DEFAULT_MATCHUP_PATH):
+    """Point the shared matrix at another directory; it is loaded on first use."""
+    global _matrix, _matrix_path
+    _matrix = None
+    _matrix_path = path
+
+
+def get_matchups():
+    """Return the shared matchup matrix, or None if it has not been built."""
+    global _matrix
+    if _matrix is None and os.path.exists(os.path.join(_matrix_path, INDEX_FILE)):
+        _matrix = MatchupMatrix.load(_matrix_path)
+    return _matrix
@@ -0,0 +1,233 @@
+"""
+Run Metrics
+-----------
+Lightweight in-process instrumentation: counters and latency histograms
+keyed by metric name and labels. The nba_api wrappers, the response cache,
+the fetch engine, the Firestore writer and the prediction stages record
+into one shared registry, which is written at the end of a run as JSON or
+Prometheus text, or served on a local /metrics endpoint.
+
+HTTP-level numbers (requests, latency and bytes per nba_api endpoint) come
+from a hook on nba_api's HTTP client, installed the first time an
+instrumented wrapper runs so that importing this module stays cheap.
+"""
+
+import bisect
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+
+class Metrics:
+    """Thread-safe registry of counters and histograms."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, clock=time.perf_counter):
+        self.buckets = tuple(buckets)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        """Add `value` to a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Record one observation (e.g. a latency in seconds) in a histogram."""
+        key = (name, _label_key(labels))
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            histogram['counts'][position] += 1
+            histogram['sum'] += value
+
+    @contextmanager
+    def timed(self, name, **labels):
+        """Time the enclosed block into a histogram, counting errors separately."""
+        start = self._clock()
+        try:
+            yield
+        except BaseException:
+            base = name[:-len("_seconds")] if name.endswith("_seconds") else name
+            self.inc(f"{base}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(name, self._clock() - start, **labels)
+
+    def reset(self):
+        """Drop every recorded value."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def merge(self, snapshot):
+        """Add the values of another registry's snapshot, e.g. one sent back by a worker process."""
+        bucket_names = [str(bound) for bound in self.buckets] + ['+Inf']
+        with self._lock:
+            for counter in snapshot['counters']:
+                key = (counter['name'], _label_key(counter['labels']))
+                self._counters[key] = self._counters.get(key, 0) + counter['value']
+            for entry in snapshot['histograms']:
+                key = (entry['name'], _label_key(entry['labels']))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+                # Snapshot buckets are cumulative
+                previous = 0
+                for position, name in enumerate(bucket_names):
+                    cumulative = entry['buckets'].get(name, previous)
+                    histogram['counts'][position] += cumulative - previous
+                    previous = cumulative
+                histogram['sum'] += entry['sum']
+
+    def snapshot(self):
+        """Return the recorded values as a JSON-serializable dict."""
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(key), 'value': value}
+                        for (name, key), value in sorted(self._counters.items())]
+            histograms = []
+            for (name, key), histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(self.buckets + (float('inf'),), histogram['counts']):
+                    cumulative += count
+                    buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+                histograms.append({'name': name, 'labels': dict(key), 'count': cumulative,
+                                   'sum': round(histogram['sum'], 6), 'buckets': buckets})
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Render the recorded values in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+        for counter in snapshot['counters']:
+            if counter['name'] not in typed:
+                lines.append(f"# TYPE {counter['name']} counter")
+                typed.add(counter['name'])
+            lines.append(f"{counter['name']}{_format_labels(_label_key(counter['labels']))} {counter['value']}")
+        for histogram in snapshot['histograms']:
+            name = histogram['name']
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, count in histogram['buckets'].items():
+                key = _label_key(dict(histogram['labels'], le=bound))
+                lines.append(f"{name}_bucket{_format_labels(key)} {count}")
+            key = _label_key(histogram['labels'])
+            lines.append(f"{name}_sum{_format_labels(key)} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(key)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to a file: JSON for *.json, Prometheus text otherwise."""
+        with open(path, 'w') as f:
+            f.write(self.to_json() if path.endswith('.json') else self.to_prometheus())
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve the metrics as Prometheus text on http://host:port/metrics from a daemon thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ('/metrics', '/metrics.json'):
+                    self.send_error(404)
+                    return
+                as_json = self.path.endswith('.json')
+                body = (metrics.to_json() if as_json else metrics.to_prometheus()).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json' if as_json else 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+_metrics = Metrics()
+_http_hook_installed = False
+_http_hook_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the shared metrics registry."""
+    return _metrics
+
+
+def install_http_hook():
+    """Record requests, latency and response bytes of every nba_api HTTP call (once per process)."""
+    global _http_hook_installed
+    with _http_hook_lock:
+        if _http_hook_installed:
+            return
+        from nba_api.library.http import NBAHTTP
+
+        send_api_request = NBAHTTP.send_api_request
+
+        @functools.wraps(send_api_request)
+        def instrumented_send(self, endpoint, *args, **kwargs):
+            name = endpoint.lower()
+            with _metrics.timed("nba_api_http_seconds", endpoint=name):
+                response = send_api_request(self, endpoint, *args, **kwargs)
+            _metrics.inc("nba_api_http_requests_total", endpoint=name)
+            _metrics.inc("nba_api_response_bytes_total", len(response.get_response().encode('utf-8')), endpoint=name)
+            return response
+
+        NBAHTTP.send_api_request = instrumented_send
+        _http_hook_installed = True
+
+
+def instrument_api(endpoint):
+    """Time calls of an nba_api wrapper and make sure the HTTP hook is installed."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            install_http_hook()
+            _metrics.inc("nba_api_calls_total", endpoint=endpoint)
+            with _metrics.timed("nba_api_call_seconds", endpoint=endpoint):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_stage(stage):
+    """Time every call of a function as a run stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _metrics.timed("nba_stage_seconds", stage=stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,164 @@
+"""
+Prediction Narratives
+---------------------
+Builds the Portuguese analysis text ("detalhes") of a prediction from a
+fixed set of fragments: how the player's position matches up against the
+opponent, the trend of their last games and their fantasy value given the
+risk level.
+
+The fragment texts are fixed tables. The opponent classifications (strong
+defenses, risk tiers) are frozensets of team IDs loaded from
+narrative_data.json. The formatted matchup and outlook parts are memoized,
+so rendering a prediction is a few set and dict lookups and one string
+concatenation. details() renders a whole slate in one pass.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+DEFAULT_NARRATIVE_DATA_PATH = os.environ.get(
+    "NBA_NARRATIVE_DATA_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "narrative_data.json"))
+
+GUARD = "guard"
+FORWARD = "forward"
+CENTER = "center"
+
+POSITION_MATCHUPS = {
+    (GUARD, True): "enfrenta um time com fortes defensores de perímetro",
+    (GUARD, False): "tem vantagem contra os defensores de perímetro",
+    (FORWARD, True): "terá um confronto difícil contra a defesa física",
+    (FORWARD, False): "deve encontrar espaços para pontuar na ala",
+    (CENTER, True): "enfrenta uma defesa forte no garrafão",
+    (CENTER, False): "pode dominar no garrafão",
+}
+
+NO_TREND = "Sem jogos suficientes para análise de tendência."
+# (trend above which the text applies, text), checked in order
+TRENDS = (
+    (5, "Está em excelente fase ofensiva, com crescimento consistente."),
+    (0, "Mostra leve tendência de melhora nas últimas partidas."),
+    (-5, "Mantém regularidade nas últimas apresentações."),
+    (float('-inf'), "Está em fase de declínio ofensivo nas últimas partidas."),
+)
+
+# (fantasy value above which the text applies, text), checked in order
+FANTASY_VALUES = (
+    (45, "excelente valor para fantasy"),
+    (35, "bom valor para fantasy"),
+    (25, "valor moderado para fantasy"),
+    (float('-inf'), "valor limitado para fantasy"),
+)
+FANTASY_RISKS = {
+    "baixo": "{value} e representa uma escolha segura",
+    "médio": "{value}, mas com alguma inconsistência",
+    "alto": "{value}, porém com risco elevado neste confronto",
+}
+
+# The analysis text is "<player name> <matchup part> <outlook part>"
+MATCHUP_TEMPLATE = "{matchup} contra {opponent}."
+OUTLOOK_TEMPLATE = "{trend} Nas últimas partidas, vem mostrando {insight}."
+
+NarrativeInput = namedtuple("NarrativeInput", ["player_name", "position", "opponent_id", "opponent_name",
+                                               "last_5_pts", "pts", "reb", "ast", "risk"])
+
+
+def _first_above(thresholds, value):
+    for threshold, text in thresholds:
+        if value > threshold:
+            return text
+    return thresholds[-1][1]
+
+
+class NarrativeEngine:
+    """Renders prediction narratives from precomputed fragments."""
+
+    def __init__(self, strong_defensive_teams=(), high_risk_opponents=(), medium_risk_opponents=(),
+                 guard_positions=(), forward_positions=()):
+        self.strong_defensive_teams = frozenset(strong_defensive_teams)
+        self.high_risk_opponents = frozenset(high_risk_opponents)
+        self.medium_risk_opponents = frozenset(medium_risk_opponents)
+        self._position_groups = {position: GUARD for position in guard_positions}
+        self._position_groups.update((position, FORWARD) for position in forward_positions)
+        self._fantasy = {(value, risk): template.format(value=value)
+                         for _, value in FANTASY_VALUES for risk, template in FANTASY_RISKS.items()}
+        self._matchups = {}
+        self._matchup_parts = {}
+        self._outlook_parts = {}
+
+    @classmethod
+    def load(cls, path=DEFAULT_NARRATIVE_DATA_PATH):
+        """Create an engine from the opponent classifications in a JSON file."""
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def position_matchup(self, position, opponent_id):
+        """How a position matches up against the opponent's defense."""
+        key = (position, opponent_id)
+        text = self._matchups.get(key)
+        if text is None:
+            group = self._position_groups.get(position, CENTER)
+            text = self._matchups[key] = POSITION_MATCHUPS[group, opponent_id in self.strong_defensive_teams]
+        return text
+
+    def performance_trend(self, last_5_pts):
+        """Trend of the player's scoring across their last games (oldest first)."""
+        if len(last_5_pts) < 2:
+            return NO_TREND
+        trend = sum(last_5_pts[-2:]) / 2 - sum(last_5_pts[:2]) / 2
+        return _first_above(TRENDS, trend)
+
+    def fantasy_insight(self, pts, reb, ast, risk):
+        """Fantasy value of the expected stat line, qualified by the risk level."""
+        value = _first_above(FANTASY_VALUES, pts + reb*1.2 + ast*1.5)
+        return self._fantasy[value, risk if risk in ("baixo", "médio") else "alto"]
+
+    def opponent_risk(self, opponent_id):
+        """Risk level of facing an opponent: 'alto', 'médio' or 'baixo'."""
+        if opponent_id in self.high_risk_opponents:
+            return "alto"
+        if opponent_id in self.medium_risk_opponents:
+            return "médio"
+        return "baixo"
+
+    def detail(self, item):
+        """
+        Render the analysis text of one NarrativeInput. The matchup part is
+        memoized by (position, opponent) and the outlook part by (trend,
+        fantasy value, risk), so each is formatted once per distinct key.
+        """
+        key = (item.position, item.opponent_id, item.opponent_name)
+        matchup_part = self._matchup_parts.get(key)
+        if matchup_part is None:
+            matchup_part = self._matchup_parts[key] = MATCHUP_TEMPLATE.format(
+                matchup=self.position_matchup(item.position, item.opponent_id), opponent=item.opponent_name)
+
+        key = (self.performance_trend(item.last_5_pts), self.fantasy_insight(item.pts, item.reb, item.ast, item.risk))
+        outlook_part = self._outlook_parts.get(key)
+        if outlook_part is None:
+            outlook_part = self._outlook_parts[key] = OUTLOOK_TEMPLATE.format(trend=key[0], insight=key[1])
+        return f"{item.player_name} {matchup_part} {outlook_part}"
+
+    def details(self, items):
+        """Render the analysis texts of many NarrativeInputs, in order."""
+        detail = self.detail
+        return [detail(item) for item in items]
+
+
+_engine = None
+_engine_path = DEFAULT_NARRATIVE_DATA_PATH
+
+
+def configure_narratives(path=DEFAULT_NARRATIVE_DATA_PATH):
+    """Point the shared engine at another data file; it is loaded on first use."""
+    global _engine, _engine_path
+    _engine = None
+    _engine_path = path
+
+
+def get_narratives():
+    """Return the shared narrative engine, loading its data on first use."""
+    global _engine
+    if _engine is None:
+        _engine = NarrativeEngine.load(_engine_path)
+    return _engine
@@ -6,7 +6,17 @@ and generates predictions for upcoming games using machine learning models.
 The results are saved to Firebase Firestore for use by the frontend.
 
 Usage:
-    python nba_predictor.py [player_id]
+    python nba_predictor.py [player_id] [--simulate [--sims 10000] [--lines lines.json]]
+    python nba_predictor.py --all-players [--workers N] [--rps N] [--retries N] [--ndjson] [--resume]
+    python nba_predictor.py --all-matches [--ndjson]
+    python nba_predictor.py --watch-matches [--live-interval 10] [--idle-interval 300]
+    python nba_predictor.py --league [--processes N] [--shard i/N]
+    python nba_predictor.py --merge-shards N
+    python nba_predictor.py --slate [--season 2024-25] [--simulate [--sims 10000] [--lines lines.json]]
+    python nba_predictor.py --sync-games [--season 2024-25]
+    python nba_predictor.py --sync-schedule [--schedule-days 14]
+    python nba_predictor.py --build-matchups [--matchup-seasons 2022-23 2023-24]
+    python nba_predictor.py --train [--train-seasons 2022-23 2023-24] [--force-train]
 
 Requirements:
     - nba_api
@@ -16,184 +26,378 @@ Requirements:
     - firebase-admin
 """
 
-import sys
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-from sklearn.linear_model import LinearRegression
-import firebase_admin
-from firebase_admin import credentials, firestore
+import argparse
+import functools
 import json
 import os
-import random
+import sys
+from datetime import datetime, timedelta
+
+from fetch_engine import fetch_all, rate_limited, DEFAULT_WORKERS, DEFAULT_RPS, DEFAULT_RETRIES
+from firestore_batch import BatchedWriter, MATCHES_COLLECTION, PREDICTIONS_COLLECTION
+from gamelog_store import configure_store, get_store, DEFAULT_STORE_PATH, PLAYER, TEAM
+from json_output import StreamingJsonWriter
+from metrics import get_metrics, instrument_api, instrument_stage
+from matchup_matrix import configure_matchups, get_matchups, build_matchup_matrix, DEFAULT_MATCHUP_PATH, LOG_COLUMNS
+from live_poller import poll_scoreboard, FirestorePublisher, JsonFilePublisher, IDLE_INTERVAL, LIVE_INTERVAL
+from narratives import get_narratives, NarrativeInput
+from prediction_summaries import publish_summaries, GAME_SUMMARIES_COLLECTION, TEAM_SUMMARIES_COLLECTION
+from performance_model import configure_models, get_models, predict_stats, train_models, DEFAULT_MODEL_PATH
+from schedule import configure_schedule, get_schedule, save_schedule, DEFAULT_SCHEDULE_DAYS, DEFAULT_SCHEDULE_PATH
+from simulation import load_lines, DEFAULT_SIMULATIONS
+from response_cache import (cached, configure_cache, get_cache, current_season, season_ttl,
+                            DEFAULT_CACHE_PATH, CURRENT_SEASON_TTL, PLAYER_INFO_TTL)
 
-# Import NBA API modules
+# Import NBA API modules. Only the static data is loaded here: the endpoint
+# modules (and pandas, numpy and firebase_admin) are imported by the code
+# paths that use them, so short CLI calls start quickly.
 try:
-    from nba_api.stats.endpoints import playergamelog, commonplayerinfo, leaguegamefinder, teamgamelog
-    from nba_api.stats.endpoints import playerdashboardbyyearoveryear, teamdashboardbyyearoveryear
-    from nba_api.stats.endpoints import commonteamroster, playervsplayer, teamvsplayer
     from nba_api.stats.static import teams, players
-    from nba_api.live.nba.endpoints import scoreboard
 except ImportError:
     print("Error: nba_api package not installed. Run 'pip install nba_api'")
     sys.exit(1)
 
-# Initialize Firebase (in production, use environment variables for credentials)
-try:
-    # Replace with your own Firebase credentials file
-    cred = credentials.Certificate("firebase-credentials.json")
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-except Exception as e:
-    print(f"Error initializing Firebase: {e}")
-    sys.exit(1)
+_db = None
+_firestore_enabled = True
+_run_config = {
+    'cache_path': DEFAULT_CACHE_PATH,
+    'cache_enabled': True,
+    'model_path': DEFAULT_MODEL_PATH,
+    'firestore': True,
+    'gamelog_path': DEFAULT_STORE_PATH,
+    'matchup_path': DEFAULT_MATCHUP_PATH,
+    'schedule_path': DEFAULT_SCHEDULE_PATH,
+}
+
+def configure_firestore(enabled=True):
+    """Enable or disable Firestore writes for this run."""
+    global _firestore_enabled
+    _firestore_enabled = enabled
 
+def get_db():
+    """Initialize Firebase on first use and return the Firestore client."""
+    global _db
+    if _db is None:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        # Initialize Firebase (in production, use environment variables for credentials)
+        # Replace with your own Firebase credentials file
+        cred = credentials.Certificate("firebase-credentials.json")
+        firebase_admin.initialize_app(cred)
+        _db = firestore.client()
+    return _db
+
+@cached("commonplayerinfo", PLAYER_INFO_TTL)
+@rate_limited
+@instrument_api("commonplayerinfo")
 def get_player_info(player_id):
     """Get basic information about a player."""
+    from nba_api.stats.endpoints import commonplayerinfo
+
     player_info = commonplayerinfo.CommonPlayerInfo(player_id=player_id)
     player_data = player_info.get_normalized_dict()
     return player_data['CommonPlayerInfo'][0]
 
+@rate_limited
+@instrument_api("playergamelog")
+def fetch_player_game_log(player_id, season='2023-24', date_from=''):
+    """Download a player's game log from `date_from` ('MM/DD/YYYY', '' for the whole season)."""
+    from nba_api.stats.endpoints import playergamelog
+
+    return playergamelog.PlayerGameLog(player_id=player_id, season=season,
+                                       date_from_nullable=date_from).get_data_frames()[0]
+
 def get_player_games(player_id, season='2023-24'):
-    """Get a player's game log for a specific season."""
-    print(f"Obtendo estatísticas do jogador ID {player_id} para a temporada {season}...")
-    game_log = playergamelog.PlayerGameLog(player_id=player_id, season=season)
-    games_df = game_log.get_data_frames()[0]
-    return games_df
+    """
+    Get a player's game log for a specific season.
+
+    Games are read from the local game log store. Only games played since the
+    last ingested one are downloaded, and only when the store is out of date.
+    """
+    store = get_store()
+    if store.needs_refresh(PLAYER, player_id, season, season_ttl(season)):
+        print(f"Obtendo estatísticas do jogador ID {player_id} para a temporada {season}...")
+        store.sync(PLAYER, player_id, season, lambda date_from: fetch_player_game_log(player_id, season, date_from))
+    return store.read(PLAYER, player_id, season)
 
+# The year-over-year dashboard always includes the current season
+@cached("playerdashboardbyyearoveryear", CURRENT_SEASON_TTL)
+@rate_limited
+@instrument_api("playerdashboardbyyearoveryear")
 def get_player_season_stats(player_id, seasons=None):
-    """Get a player's season-by-season statistics."""
+    """
+    Get a player's season-by-season statistics, one row per season in
+    `seasons` (GROUP_VALUE holds the season).
+
+    Costs one request per player; get_league_player_season_stats gets every
+    player's seasons with one request per season.
+    """
+    from nba_api.stats.endpoints import playerdashboardbyyearoveryear
+
     if seasons is None:
         seasons = ['2021-22', '2022-23', '2023-24']
     
     print(f"Obtendo estatísticas por temporada do jogador ID {player_id}...")
     dashboard = playerdashboardbyyearoveryear.PlayerDashboardByYearOverYear(
         player_id=player_id,
-        per_mode_simple='PerGame'
+        season=max(seasons),
+        per_mode_detailed='PerGame'
     )
     
-    season_stats = dashboard.get_data_frames()[1]  # OverallPlayerDashboard
-    return season_stats
+    season_stats = dashboard.by_year_player_dashboard.get_data_frame()
+    return season_stats[season_stats['GROUP_VALUE'].isin(seasons)].reset_index(drop=True)
+
+@cached("leaguedashplayerstats", lambda params: season_ttl(params["season"]))
+@rate_limited
+@instrument_api("leaguedashplayerstats")
+def fetch_league_player_stats(season='2023-24'):
+    """Download the per-game stats of every player in a season with one request."""
+    from nba_api.stats.endpoints import leaguedashplayerstats
+
+    return leaguedashplayerstats.LeagueDashPlayerStats(
+        season=season,
+        per_mode_detailed='PerGame'
+    ).get_data_frames()[0]
+
+def get_league_player_season_stats(seasons=None, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, retries=DEFAULT_RETRIES):
+    """
+    Get the season-by-season statistics of every player with one request per season.
+
+    Returns a compact DataFrame indexed by (PLAYER_ID, SEASON), so
+    `stats.loc[player_id]` gives one player's seasons.
+    """
+    return _league_season_stats(fetch_league_player_stats, 'PLAYER_ID', seasons, workers, rps, retries)
+
+@rate_limited
+@instrument_api("teamgamelog")
+def fetch_team_game_log(team_id, season='2023-24', date_from=''):
+    """Download a team's game log from `date_from` ('MM/DD/YYYY', '' for the whole season)."""
+    from nba_api.stats.endpoints import teamgamelog
+
+    return teamgamelog.TeamGameLog(team_id=team_id, season=season,
+                                   date_from_nullable=date_from).get_data_frames()[0]
 
 def get_team_games(team_id, season='2023-24'):
-    """Get a team's game log for a specific season."""
-    print(f"Obtendo estatísticas do time ID {team_id} para a temporada {season}...")
-    game_log = teamgamelog.TeamGameLog(team_id=team_id, season=season)
-    games_df = game_log.get_data_frames()[0]
-    return games_df
+    """
+    Get a team's game log for a specific season.
 
+    Served from the local game log store like get_player_games.
+    """
+    store = get_store()
+    if store.needs_refresh(TEAM, team_id, season, season_ttl(season)):
+        print(f"Obtendo estatísticas do time ID {team_id} para a temporada {season}...")
+        store.sync(TEAM, team_id, season, lambda date_from: fetch_team_game_log(team_id, season, date_from))
+    return store.read(TEAM, team_id, season)
+
+@cached("teamdashboardbyyearoveryear", CURRENT_SEASON_TTL)
+@rate_limited
+@instrument_api("teamdashboardbyyearoveryear")
 def get_team_season_stats(team_id, seasons=None):
-    """Get a team's season-by-season statistics."""
+    """
+    Get a team's season-by-season statistics, one row per season in
+    `seasons` (GROUP_VALUE holds the season).
+    """
+    from nba_api.stats.endpoints import teamdashboardbyyearoveryear
+
     if seasons is None:
         seasons = ['2021-22', '2022-23', '2023-24']
     
     print(f"Obtendo estatísticas por temporada do time ID {team_id}...")
     dashboard = teamdashboardbyyearoveryear.TeamDashboardByYearOverYear(
         team_id=team_id,
-        per_mode_simple='PerGame'
+        season=max(seasons),
+        per_mode_detailed='PerGame'
     )
     
-    season_stats = dashboard.get_data_frames()[1]  # OverallTeamDashboard
-    return season_stats
+    season_stats = dashboard.by_year_team_dashboard.get_data_frame()
+    return season_stats[season_stats['GROUP_VALUE'].isin(seasons)].reset_index(drop=True)
+
+@cached("leaguedashteamstats", lambda params: season_ttl(params["season"]))
+@rate_limited
+@instrument_api("leaguedashteamstats")
+def fetch_league_team_stats(season='2023-24'):
+    """Download the per-game stats of every team in a season with one request."""
+    from nba_api.stats.endpoints import leaguedashteamstats
+
+    return leaguedashteamstats.LeagueDashTeamStats(
+        season=season,
+        per_mode_detailed='PerGame'
+    ).get_data_frames()[0]
+
+def get_league_team_season_stats(seasons=None, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, retries=DEFAULT_RETRIES):
+    """
+    Get the season-by-season statistics of every team with one request per season.
+
+    Returns a compact DataFrame indexed by (TEAM_ID, SEASON).
+    """
+    return _league_season_stats(fetch_league_team_stats, 'TEAM_ID', seasons, workers, rps, retries)
+
+def _league_season_stats(fetch, id_column, seasons, workers, rps, retries):
+    import pandas as pd
+    from columnar import compact_frame
+
+    if seasons is None:
+        seasons = ['2021-22', '2022-23', '2023-24']
+
+    print(f"Obtendo estatísticas da liga por temporada ({', '.join(seasons)})...")
+    frames = []
+    for season, stats, error in fetch_all(fetch, list(dict.fromkeys(seasons)), workers=workers, rps=rps, retries=retries):
+        if error is not None:
+            print(f"Erro ao obter estatísticas da temporada {season}: {error}")
+        elif len(stats):
+            frames.append(stats.assign(SEASON=season))
+    if not frames:
+        return pd.DataFrame(columns=[id_column, 'SEASON']).set_index([id_column, 'SEASON'])
+    return compact_frame(pd.concat(frames, ignore_index=True)).set_index([id_column, 'SEASON']).sort_index()
 
+@cached("teamvsplayer", lambda params: season_ttl(params["season"]))
+@rate_limited
+@instrument_api("teamvsplayer")
 def get_player_vs_opponent_stats(player_id, opponent_team_id, season='2023-24'):
     """Get a player's statistics against a specific opponent."""
+    from nba_api.stats.endpoints import teamvsplayer
+
     print(f"Obtendo estatísticas do jogador ID {player_id} contra o time ID {opponent_team_id}...")
     vs_team = teamvsplayer.TeamVsPlayer(
         team_id=opponent_team_id,
-        player_id=player_id,
+        vs_player_id=player_id,
         season=season,
-        per_mode_simple='PerGame'
+        per_mode_detailed='PerGame'
     )
     
     vs_team_stats = vs_team.get_data_frames()[0]  # OverallTeamPlayerOnOffSummary
     return vs_team_stats
 
-def get_player_monthly_splits(player_id, season='2023-24'):
-    """Get a player's monthly statistics for a specific season (simulated)."""
-    # In a real implementation, this would use nba_api's player splits
-    # For now, we'll generate simulated data based on season averages
-    games_df = get_player_games(player_id, season)
-    season_avg_pts = games_df['PTS'].mean()
-    season_avg_fg_pct = games_df['FG_PCT'].mean()
-    
-    # Simulate monthly variations
-    months = ["October", "November", "December", "January", "February", "March", "April"]
-    monthly_stats = []
-    
-    for month in months:
-        # Add random variation to stats
-        pts_variation = np.random.normal(0, 2)
-        fg_pct_variation = np.random.normal(0, 0.02)
-        
-        monthly_stats.append({
-            "month": month,
-            "ppg": max(0, season_avg_pts + pts_variation),
-            "fg_pct": max(0, min(1, season_avg_fg_pct + fg_pct_variation)),
-            "games": np.random.randint(6, 14),
+def get_players_monthly_splits(logs):
+    """
+    Compute the monthly splits of many players from their stacked game logs.
+
+    Returns a dict keyed by player ID with one entry per month played, in
+    calendar order: month name, points per game, FG% (total FGM / FGA),
+    games and wins.
+    """
+    from features import monthly_splits
+
+    if not len(logs):
+        return {}
+    splits = {}
+    for row in monthly_splits(logs).itertuples(index=False):
+        splits.setdefault(row.PLAYER_ID, []).append({
+            "month": row.MONTH.strftime('%B'),
+            "ppg": float(row.PPG),
+            "fg_pct": float(row.FG_PCT),
+            "games": int(row.GAMES),
+            "wins": int(row.WINS),
         })
-    
-    # Add wins based on approximated win percentage
-    for stat in monthly_stats:
-        stat["wins"] = np.random.randint(1, stat["games"])
-    
-    return monthly_stats
+    return splits
+
+def get_player_monthly_splits(player_id, season='2023-24', games_df=None):
+    """Get a player's monthly statistics for a specific season from the game log."""
+    if games_df is None:
+        games_df = get_player_games(player_id, season)
+    return get_players_monthly_splits(games_df).get(player_id, [])
+
+@cached("commonteamroster", lambda params: season_ttl(params["season"]))
+@rate_limited
+@instrument_api("commonteamroster")
+def get_team_roster(team_id, season='2023-24'):
+    """Get a team's roster for a specific season."""
+    from nba_api.stats.endpoints import commonteamroster
+
+    print(f"Obtendo elenco do time ID {team_id} para a temporada {season}...")
+    roster = commonteamroster.CommonTeamRoster(team_id=team_id, season=season)
+    return roster.get_normalized_dict()['CommonTeamRoster']
+
+@functools.lru_cache(maxsize=None)
+def _team_index():
+    """Build the team lookup tables by ID and abbreviation once per process."""
+    nba_teams = teams.get_teams()
+    return ({team['id']: team for team in nba_teams},
+            {team['abbreviation']: team for team in nba_teams})
+
+@functools.lru_cache(maxsize=None)
+def _player_index():
+    """Build the player lookup table by ID and the active player list once per process."""
+    all_players = players.get_players()
+    return ({player['id']: player for player in all_players},
+            tuple(player for player in all_players if player['is_active']))
+
+def find_team_by_id(team_id):
+    """Get a team's static info by ID, or None if unknown."""
+    try:
+        return _team_index()[0].get(int(team_id))
+    except (TypeError, ValueError):
+        return None
+
+def find_team_by_abbreviation(team_abbr):
+    """Get a team's static info by abbreviation, or None if unknown."""
+    return _team_index()[1].get(team_abbr)
+
+def find_player_by_id(player_id):
+    """Get a player's static info by ID, or None if unknown."""
+    return _player_index()[0].get(int(player_id))
 
 def get_team_id_by_abbreviation(team_abbr):
     """Get team ID from abbreviation."""
-    nba_teams = teams.get_teams()
-    for team in nba_teams:
-        if team['abbreviation'] == team_abbr:
-            return team['id']
-    return None
+    team = find_team_by_abbreviation(team_abbr)
+    return team['id'] if team else None
 
 def get_all_active_players():
     """Get all active NBA players."""
     print("Buscando todos os jogadores ativos da NBA...")
-    all_players = players.get_active_players()
-    return all_players
+    return list(_player_index()[1])
+
+@rate_limited
+@instrument_api("scoreboard")
+def fetch_live_matches():
+    """Get today's matches from the live scoreboard, raising on API errors."""
+    from nba_api.live.nba.endpoints import scoreboard
+
+    # Get today's games
+    today = datetime.now()
+    board = scoreboard.ScoreBoard()
+    games = board.games.get_dict() if board.games else []
+    formatted_games = []
+    
+    for game in games:
+        date = today.strftime("%Y-%m-%d")
+        time = game.get('gameTimeLocal', 'TBD')
+        game_status = game.get('gameStatus', 'scheduled')
+        quarter = game.get('period', 0)
+        remaining_time = game.get('gameClock', '')
+        
+        home_team = {
+            'name': game.get('homeTeam', {}).get('teamName', ''),
+            'logo': f"https://cdn.nba.com/logos/nba/{game.get('homeTeam', {}).get('teamId', '')}/global/L/logo.svg",
+            'score': game.get('homeTeam', {}).get('score', 0),
+            'id': game.get('homeTeam', {}).get('teamId', '')
+        }
+        
+        away_team = {
+            'name': game.get('awayTeam', {}).get('teamName', ''),
+            'logo': f"https://cdn.nba.com/logos/nba/{game.get('awayTeam', {}).get('teamId', '')}/global/L/logo.svg",
+            'score': game.get('awayTeam', {}).get('score', 0),
+            'id': game.get('awayTeam', {}).get('teamId', '')
+        }
+        
+        formatted_games.append({
+            'id': game.get('gameId', ''),
+            'date': date,
+            'time': time,
+            'status': game_status,
+            'quarter': f"{quarter}º Quarto" if quarter > 0 else "Não iniciado",
+            'remainingTime': remaining_time,
+            'homeTeam': home_team,
+            'awayTeam': away_team
+        })
+        
+    return formatted_games
 
 def get_all_matches():
     """Get all upcoming and recent NBA matches."""
     try:
-        # Get today's games
-        today = datetime.now()
-        games = scoreboard.ScoreBoard().get_normalized_dict()
-        formatted_games = []
-        
-        for game in games.get('Game', []):
-            date = today.strftime("%Y-%m-%d")
-            time = game.get('gameTimeLocal', 'TBD')
-            game_status = game.get('gameStatus', 'scheduled')
-            quarter = game.get('period', 0)
-            remaining_time = game.get('gameClock', '')
-            
-            home_team = {
-                'name': game.get('homeTeam', {}).get('teamName', ''),
-                'logo': f"https://cdn.nba.com/logos/nba/{game.get('homeTeam', {}).get('teamId', '')}/global/L/logo.svg",
-                'score': game.get('homeTeam', {}).get('score', 0),
-                'id': game.get('homeTeam', {}).get('teamId', '')
-            }
-            
-            away_team = {
-                'name': game.get('awayTeam', {}).get('teamName', ''),
-                'logo': f"https://cdn.nba.com/logos/nba/{game.get('awayTeam', {}).get('teamId', '')}/global/L/logo.svg",
-                'score': game.get('awayTeam', {}).get('score', 0),
-                'id': game.get('awayTeam', {}).get('teamId', '')
-            }
-            
-            formatted_games.append({
-                'id': game.get('gameId', ''),
-                'date': date,
-                'time': time,
-                'status': game_status,
-                'quarter': f"{quarter}º Quarto" if quarter > 0 else "Não iniciado",
-                'remainingTime': remaining_time,
-                'homeTeam': home_team,
-                'awayTeam': away_team
-            })
-            
-        return formatted_games
+        return fetch_live_matches()
     except Exception as e:
         print(f"Error fetching games: {e}")
         # Return mock data if API fails
@@ -220,152 +424,331 @@ def get_all_matches():
             }
         ]
 
+@cached("leaguegamelog", lambda params: season_ttl(params["season"]))
+@rate_limited
+@instrument_api("leaguegamelog")
+def get_league_games(season='2023-24'):
+    """Get every team's game log for a season with a single request."""
+    from nba_api.stats.endpoints import leaguegamelog
+
+    print(f"Obtendo jogos de todos os times para a temporada {season}...")
+    game_log = leaguegamelog.LeagueGameLog(season=season, player_or_team_abbreviation='T')
+    return game_log.get_data_frames()[0]
+
+def compute_team_trends(games_df):
+    """
+    Compute trends for every team in a stacked team game log in one grouped pass.
+
+    `games_df` has one row per team and game (TEAM_ID, GAME_ID, GAME_DATE,
+    MATCHUP, WL, PTS). OPP_PTS is derived from the other team's row of the
+    same game when the column is missing. Returns a dict keyed by team ID
+    with the same shape as get_team_trends.
+    """
+    import numpy as np
+    import pandas as pd
+    from features import parse_game_dates
+
+    df = games_df.rename(columns={'Team_ID': 'TEAM_ID', 'Game_ID': 'GAME_ID'})
+    if 'OPP_PTS' not in df.columns:
+        game_pts = df.groupby('GAME_ID')['PTS']
+        both_teams = game_pts.transform('count') == 2
+        df = df.assign(OPP_PTS=(game_pts.transform('sum') - df['PTS']).where(both_teams))
+
+    # Newest game first within each team, like the team game log endpoint
+    df = (df.assign(GAME_DATE=parse_game_dates(df['GAME_DATE']))
+          .sort_values(['TEAM_ID', 'GAME_DATE', 'GAME_ID'], ascending=[True, False, False], kind='stable')
+          .reset_index(drop=True))
+    by_team = df.groupby('TEAM_ID', sort=True)
+    position = by_team.cumcount()
+    win = df['WL'] == 'W'
+    away = df['MATCHUP'].str.contains('@', regex=False)
+
+    # Streak: games from the most recent one (within the last 10) with the same result
+    broken = (df['WL'] != by_team['WL'].transform('first')).groupby(df['TEAM_ID']).cummax()
+    summary = pd.DataFrame({
+        'streakType': by_team['WL'].first(),
+        'streakCount': (~broken & (position < 10)).groupby(df['TEAM_ID']).sum(),
+        'homeWins': (win & ~away).groupby(df['TEAM_ID']).sum(),
+        'homeGames': (~away).groupby(df['TEAM_ID']).sum(),
+        'awayWins': (win & away).groupby(df['TEAM_ID']).sum(),
+        'awayGames': away.groupby(df['TEAM_ID']).sum(),
+        'ppg': by_team['PTS'].mean(),
+        'oppg': by_team['OPP_PTS'].mean(),
+    })
+
+    last_10 = df.loc[position < 10, ['TEAM_ID', 'WL', 'PTS']]
+    last_10_formatted = {team_id: [] for team_id in summary.index}
+    for team_id, result, points in zip(last_10['TEAM_ID'].tolist(), last_10['WL'].tolist(),
+                                       last_10['PTS'].tolist()):
+        last_10_formatted[team_id].append({'result': 'W' if result == 'W' else 'L', 'points': points})
+
+    # Mock standings position (would be fetched from standings endpoint in real implementation)
+    standing_positions = np.random.randint(1, 15, size=len(summary))
+
+    return {
+        team_id: {
+            'lastTenGames': last_10_formatted[team_id],
+            'streakType': row.streakType,
+            'streakCount': int(row.streakCount),
+            'homeRecord': f"{row.homeWins}-{row.homeGames - row.homeWins}",
+            'awayRecord': f"{row.awayWins}-{row.awayGames - row.awayWins}",
+            'standingPosition': int(standing_position),
+            'ppg': float(row.ppg),
+            'oppg': float(row.oppg),
+        }
+        for team_id, row, standing_position in zip(summary.index.tolist(), summary.itertuples(),
+                                                   standing_positions)
+    }
+
+# Season -> (league game log, trends computed from it)
+_league_trends = {}
+
+def get_league_team_trends(season='2023-24'):
+    """
+    Get trends and recent performance (last 10 games) for every team at once.
+
+    The trends are computed once per cached league game log, so per-team
+    calls reuse them until the log is refreshed.
+    """
+    games_df = get_league_games(season)
+    entry = _league_trends.get(season)
+    if entry is None or entry[0] is not games_df:
+        print(f"Obtendo tendências de todos os times para a temporada {season}...")
+        entry = _league_trends[season] = (games_df, compute_team_trends(games_df))
+    return entry[1]
+
 def get_team_trends(team_id, season='2023-24'):
     """Get team trends and recent performance (last 10 games)."""
     print(f"Obtendo tendências do time ID {team_id}...")
-    
-    # Get team game log
-    games_df = get_team_games(team_id, season)
-    
-    # Get last 10 games
-    last_10_games = games_df.head(10)
-    
-    # Calculate win/loss streak
-    current_result = last_10_games.iloc[0]['WL']
-    streak_count = 1
-    
-    for i in range(1, min(len(last_10_games), 10)):
-        if last_10_games.iloc[i]['WL'] == current_result:
-            streak_count += 1
-        else:
-            break
-    
-    # Calculate home and away records
-    home_games = games_df[games_df['MATCHUP'].str.contains('vs')]
-    away_games = games_df[games_df['MATCHUP'].str.contains('@')]
-    
-    home_wins = len(home_games[home_games['WL'] == 'W'])
-    home_losses = len(home_games) - home_wins
-    
-    away_wins = len(away_games[away_games['WL'] == 'W'])
-    away_losses = len(away_games) - away_wins
-    
-    # Format last 10 games for trend visualization
-    last_10_formatted = []
-    for _, game in last_10_games.iterrows():
-        last_10_formatted.append({
-            'result': 'W' if game['WL'] == 'W' else 'L',
-            'points': game['PTS']
-        })
-    
-    # Calculate points per game and opponent points per game
-    ppg = games_df['PTS'].mean()
-    oppg = games_df['OPP_PTS'].mean()
-    
-    # Mock standings position (would be fetched from standings endpoint in real implementation)
-    standing_position = np.random.randint(1, 15)
-    
+    return get_league_team_trends(season).get(int(team_id))
+
+@cached("scoreboardv2", CURRENT_SEASON_TTL)
+@rate_limited
+@instrument_api("scoreboardv2")
+def get_scheduled_games(game_date):
+    """Get the league games scheduled on a date ('YYYY-MM-DD') from the scoreboard."""
+    from nba_api.stats.endpoints import scoreboardv2
+
+    board = scoreboardv2.ScoreboardV2(game_date=game_date)
+    return [
+        {
+            'game_id': row['GAME_ID'],
+            'date': game_date,
+            'home_team_id': int(row['HOME_TEAM_ID']),
+            'away_team_id': int(row['VISITOR_TEAM_ID']),
+        }
+        for row in board.get_normalized_dict()['GameHeader']
+    ]
+
+@instrument_stage("sync_schedule")
+def sync_schedule(days=DEFAULT_SCHEDULE_DAYS, start=None, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS,
+                  retries=DEFAULT_RETRIES):
+    """Fetch the league games of the next `days` days and store them in the local schedule."""
+    start = start or datetime.now()
+    dates = [(start + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days)]
+    print(f"Atualizando o calendário da liga de {dates[0]} a {dates[-1]}...")
+
+    fetched_dates = []
+    games = []
+    for game_date, day_games, error in fetch_all(get_scheduled_games, dates, workers=workers, rps=rps,
+                                                 retries=retries):
+        if error is not None:
+            print(f"Erro ao obter jogos de {game_date}: {error}")
+            continue
+        fetched_dates.append(game_date)
+        games.extend(day_games)
+
+    schedule = get_schedule()
+    if fetched_dates:
+        schedule.update(fetched_dates, games)
+        save_schedule()
+    else:
+        schedule.mark_failed()
+    print(f"Calendário: {len(games)} jogos em {len(fetched_dates)} dias")
+    return schedule
+
+def get_upcoming_games(team_id, days=7, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, retries=DEFAULT_RETRIES):
+    """
+    Get a team's next game within `days` days.
+
+    The game comes from the local schedule cache, refreshed from the
+    scoreboard (with the given fetch settings) when it is older than
+    SCHEDULE_MAX_AGE, so every call in a run gives the same answer. A failed
+    refresh is not retried for SCHEDULE_RETRY_AFTER.
+    """
+    schedule = get_schedule()
+    if schedule.is_stale():
+        try:
+            sync_schedule(workers=workers, rps=rps, retries=retries)
+        except Exception as e:
+            print(f"Erro ao atualizar o calendário: {e}")
+            schedule.mark_failed()
+
+    today = datetime.now()
+    game = schedule.next_game(team_id, today.strftime("%Y-%m-%d"))
+    if game is None or game['date'] > (today + timedelta(days=days)).strftime("%Y-%m-%d"):
+        return None
+
+    opponent = find_team_by_id(game['opponent_id']) or {}
     return {
-        'lastTenGames': last_10_formatted,
-        'streakType': current_result,
-        'streakCount': streak_count,
-        'homeRecord': f"{home_wins}-{home_losses}",
-        'awayRecord': f"{away_wins}-{away_losses}",
-        'standingPosition': standing_position,
-        'ppg': ppg,
-        'oppg': oppg
+        "game_id": game['game_id'],
+        "opponent": opponent.get('abbreviation', 'OPP'),
+        "opponent_id": game['opponent_id'],
+        "date": game['date'],
+        "home": game['home'],
     }
 
-def get_upcoming_games(team_id, days=7):
-    """Get upcoming games for a team (mock function - in real implementation would use NBA schedule API)."""
-    today = datetime.now()
-    future_date = today + timedelta(days=days)
-    today_str = today.strftime("%Y-%m-%d")
-    
-    # In a real implementation, we would fetch the actual schedule
-    # For demonstration, we'll generate dynamic mock data with current date
-    
-    # Generate a date in the next 3 days
-    random_days = random.randint(1, 3)
-    upcoming_date = (today + timedelta(days=random_days)).strftime("%Y-%m-%d")
-    
-    # Map of teams and their opponents
-    teams_data = {
-        "1610612747": { # Lakers
-            "opponent": "CHI",
-            "opponent_id": 1610612741,
-            "date": upcoming_date,
-            "home": True,
-        },
-        "1610612744": { # Warriors
-            "opponent": "BOS",
-            "opponent_id": 1610612738,
-            "date": upcoming_date,
-            "home": True,
-        },
-        "1610612738": { # Celtics
-            "opponent": "GSW",
-            "opponent_id": 1610612744,
-            "date": upcoming_date,
-            "home": False,
-        },
-        "1610612741": { # Bulls
-            "opponent": "LAL",
-            "opponent_id": 1610612747,
-            "date": upcoming_date,
-            "home": False,
+@instrument_stage("features")
+def get_players_history(logs, upcoming):
+    """
+    Compute pre-game features, expected stats and recent points for many players at once.
+
+    `logs` holds the stacked game logs of every player and `upcoming` has one
+    row per player (PLAYER_ID, OPPONENT, IS_HOME, GAME_DATE). Returns a dict
+    keyed by player ID with the feature values, the expected stats and the
+    last 5 games' points, oldest first. Expected stats come from one batched
+    predict() over all players, or from the EWMA when no model is trained.
+    """
+    from features import build_upcoming_features, prepare_game_logs, STATS
+
+    feature_set = build_upcoming_features(logs, upcoming)
+    player_ids = feature_set.keys['PLAYER_ID'].tolist()
+
+    bundle = get_models()
+    if bundle is not None:
+        expected = predict_stats(bundle, feature_set.matrix)
+    else:
+        expected = feature_set.matrix[:, [feature_set.columns.index(f"{stat}_EWM") for stat in STATS]]
+
+    last_5_pts = {}
+    if len(logs):
+        recent = prepare_game_logs(logs).groupby('PLAYER_ID').tail(5)
+        last_5_pts = recent.groupby('PLAYER_ID')['PTS'].agg(list).to_dict()
+
+    return {
+        player_id: {
+            'features': dict(zip(feature_set.columns, row.tolist())),
+            'expected': dict(zip(STATS, expected_row.tolist())),
+            'last_5_pts': [float(pts) for pts in last_5_pts.get(player_id, [])],
         }
+        for player_id, row, expected_row in zip(player_ids, feature_set.matrix, expected)
     }
-    
-    # If the team isn't in our map, generate a random opponent
-    if str(team_id) not in teams_data:
-        random_opponent = random.choice(list(teams_data.keys()))
-        teams_data[str(team_id)] = {
-            "opponent": "OPP",  # Generic opponent
-            "opponent_id": int(random_opponent),
-            "date": upcoming_date,
-            "home": random.choice([True, False]),
+
+SIMULATION_LABELS = {'PTS': 'pontos', 'REB': 'rebotes', 'AST': 'assistencias'}
+
+@instrument_stage("simulation")
+def simulate_players(logs, histories, n_sims=DEFAULT_SIMULATIONS, lines=None, seed=None):
+    """
+    Run the Monte Carlo simulation for many players at once.
+
+    `histories` comes from get_players_history; every player is simulated
+    around its expected stats from its own game log in `logs`. Returns the
+    per-player summaries of simulation.summarize.
+    """
+    import numpy as np
+    from features import STATS
+    from simulation import game_history, simulate, summarize
+
+    player_ids = list(histories)
+    expected = np.array([[histories[player_id]['expected'][stat] for stat in STATS] for player_id in player_ids],
+                        dtype=np.float32).reshape(len(player_ids), len(STATS))
+    return summarize(simulate(game_history(logs, player_ids), expected, n_sims=n_sims, seed=seed), lines)
+
+def format_simulation(summary, n_sims):
+    """Convert a player's simulation summary to the prediction JSON fields."""
+    formatted = {"simulacoes": n_sims, "coef_variacao": summary['cv']}
+    for stat, label in SIMULATION_LABELS.items():
+        stat_summary = summary[stat]
+        formatted[label] = {
+            "media": stat_summary['mean'],
+            "desvio": stat_summary['std'],
+            "percentis": stat_summary['percentiles'],
         }
-    
-    return teams_data.get(str(team_id), None)
+        if 'line' in stat_summary:
+            formatted[label].update({
+                "linha": stat_summary['line'],
+                "prob_over": stat_summary['over'],
+                "prob_under": stat_summary['under'],
+            })
+    return formatted
+
+@instrument_stage("predict_player")
+def predict_player_performance(player_id, opponent_id, season='2023-24', player_info=None, upcoming_game=None,
+                               history=None, simulation=None, simulate=False, n_sims=DEFAULT_SIMULATIONS,
+                               lines=None, pending_narratives=None):
+    """
+    Predict player performance against a specific opponent.
+
+    `player_info`, `upcoming_game` and `history` (from get_players_history)
+    can be passed in when the caller already has them, e.g. when predicting a
+    whole slate, to skip the per-player lookups.
+
+    Returns None when the player has no game in `season` to predict from.
+
+    With `simulate` (or a precomputed `simulation` summary from
+    simulate_players) the prediction also carries the simulated distribution
+    of each stat, and the risk level comes from its variance.
+
+    When a `pending_narratives` list is given, the analysis text is not
+    rendered: (prediction, NarrativeInput) is appended to the list so the
+    caller can render a whole batch with NarrativeEngine.details.
+    """
+    import pandas as pd
 
-def predict_player_performance(player_id, opponent_id, season='2023-24'):
-    """Predict player performance against a specific opponent."""
     print(f"Gerando previsão para o jogador ID {player_id} contra o time ID {opponent_id}...")
     
     # Get player's info
-    player_info = get_player_info(player_id)
+    if player_info is None:
+        player_info = get_player_info(player_id)
     player_name = f"{player_info['FIRST_NAME']} {player_info['LAST_NAME']}"
     team_abbr = player_info.get('TEAM_ABBREVIATION', 'NBA')
     team_id = player_info.get('TEAM_ID', 0)
     position = player_info.get('POSITION', 'G')
     
-    # Get player's game log - in real app we'd use actual data
-    # For demo, we'll generate synthetic stats
-    avg_pts = random.uniform(12.0, 28.0)
-    avg_reb = random.uniform(3.0, 12.0)
-    avg_ast = random.uniform(2.0, 9.0)
-    last_5_pts = [round(random.uniform(max(0, avg_pts-10), avg_pts+10), 1) for _ in range(5)]
-    
     # Get opponent team info
-    opponent_team_name = teams.find_team_name_by_id(opponent_id).get('full_name', 'Unknown Team')
-    opponent_abbr = teams.find_team_name_by_id(opponent_id).get('abbreviation', 'OPP')
-    
-    # Generate prediction
-    expected_pts = round(random.uniform(max(0, avg_pts-5), avg_pts+7), 1)
-    expected_reb = round(random.uniform(max(0, avg_reb-3), avg_reb+3), 1)
-    expected_ast = round(random.uniform(max(0, avg_ast-2), avg_ast+2), 1)
+    opponent_team = find_team_by_id(opponent_id) or {}
+    opponent_team_name = opponent_team.get('full_name', 'Unknown Team')
+    opponent_abbr = opponent_team.get('abbreviation', 'OPP')
     
     # Get upcoming game
-    upcoming_game = get_upcoming_games(team_id)
+    if upcoming_game is None:
+        upcoming_game = get_upcoming_games(team_id)
     if not upcoming_game:
         print("Nenhum jogo próximo encontrado.")
         return None
         
-    opponent_abbr = upcoming_game['opponent']
     game_date = upcoming_game['date']
     is_home = upcoming_game['home']
     
+    # Get player's history against this opponent from the game log
+    if history is None:
+        upcoming = pd.DataFrame([{'PLAYER_ID': player_id, 'OPPONENT': opponent_abbr,
+                                  'IS_HOME': is_home, 'GAME_DATE': game_date}])
+        history = get_players_history(get_player_games(player_id, season), upcoming)[player_id]
+    # Without a game this season every feature is zero, and so is the prediction
+    if not history['features']['GAMES_PLAYED']:
+        print(f"Jogador ID {player_id} sem jogos na temporada {season}; previsão ignorada.")
+        return None
+    if simulation is None and simulate:
+        simulation = simulate_players(get_player_games(player_id, season), {player_id: history},
+                                      n_sims=n_sims, lines=lines)[player_id]
+    features = history['features']
+    avg_pts = features['PTS_VS_OPP']
+    avg_reb = features['REB_VS_OPP']
+    avg_ast = features['AST_VS_OPP']
+    # Prefer the precomputed matchup matrix, which covers every ingested season
+    matchups = get_matchups()
+    matchup = matchups.lookup(player_id, opponent_id) if matchups is not None else None
+    if matchup is not None:
+        avg_pts, avg_reb, avg_ast = matchup['PTS'], matchup['REB'], matchup['AST']
+    last_5_pts = history['last_5_pts']
+    opponent_abbr = upcoming_game['opponent']
+    
+    # Generate prediction
+    expected_pts = round(history['expected']['PTS'], 1)
+    expected_reb = round(history['expected']['REB'], 1)
+    expected_ast = round(history['expected']['AST'], 1)
+    
     # Format game string
     if is_home:
         game_str = f"{team_abbr} vs {opponent_abbr}"
@@ -373,26 +756,25 @@ def predict_player_performance(player_id, opponent_id, season='2023-24'):
         game_str = f"{team_abbr} @ {opponent_abbr}"
     
     # Determine risk level
-    if opponent_id in [1610612738, 1610612741, 1610612761]:  # Celtics, Bulls, Raptors IDs
-        risk_level = "alto"
-    elif opponent_id in [1610612740, 1610612746, 1610612756]:  # Pelicans, Clippers, Suns IDs
-        risk_level = "médio"
+    if simulation is not None:
+        risk_level = simulation['risk']
     else:
-        risk_level = "baixo"
+        risk_level = get_narratives().opponent_risk(opponent_id)
     
-    # Generate narratives and insights
-    position_matchup = generate_position_matchup(position, opponent_id)
-    performance_trend = generate_performance_trend(last_5_pts)
-    fantasy_insight = generate_fantasy_insight(expected_pts, expected_reb, expected_ast, risk_level)
-    
-    # Create detailed analysis
-    analysis_detail = f"{player_name} {position_matchup} contra {opponent_team_name}. {performance_trend} Nas últimas partidas, vem mostrando {fantasy_insight}."
+    # Create detailed analysis, or leave it to the caller to render in a batch
+    narrative = NarrativeInput(player_name, position, opponent_id, opponent_team_name, last_5_pts,
+                               expected_pts, expected_reb, expected_ast, risk_level)
+    analysis_detail = get_narratives().detail(narrative) if pending_narratives is None else None
     
     # Final prediction object
     prediction = {
         "jogador": player_name,
+        "jogador_id": player_id,
         "proximo_jogo": game_str,
         "data_jogo": game_date,
+        "jogo_id": upcoming_game.get('game_id'),
+        "time_id": team_id,
+        "adversario_id": opponent_id,
         "historico_vs_adversario": {
             "pts_media": round(avg_pts, 1),
             "reb_media": round(avg_reb, 1),
@@ -407,130 +789,483 @@ def predict_player_performance(player_id, opponent_id, season='2023-24'):
             "detalhes": analysis_detail
         }
     }
+    if matchup is not None:
+        prediction["historico_vs_adversario"]["jogos"] = matchup['games']
+    if simulation is not None:
+        prediction["previsao"]["simulacao"] = format_simulation(simulation, n_sims)
+    if pending_narratives is not None:
+        pending_narratives.append((prediction, narrative))
     
     return prediction
 
 def generate_position_matchup(position, opponent_id):
     """Generate position matchup narrative."""
-    strong_defensive_teams = [1610612738, 1610612741, 1610612759]  # Celtics, Bulls, Spurs
-    
-    if position in ['G', 'PG', 'SG']:
-        if opponent_id in strong_defensive_teams:
-            return "enfrenta um time com fortes defensores de perímetro"
-        else:
-            return "tem vantagem contra os defensores de perímetro"
-    elif position in ['F', 'SF', 'PF']:
-        if opponent_id in strong_defensive_teams:
-            return "terá um confronto difícil contra a defesa física"
-        else:
-            return "deve encontrar espaços para pontuar na ala"
-    else:  # Center
-        if opponent_id in strong_defensive_teams:
-            return "enfrenta uma defesa forte no garrafão"
-        else:
-            return "pode dominar no garrafão"
+    return get_narratives().position_matchup(position, opponent_id)
 
 def generate_performance_trend(last_5_pts):
     """Generate performance trend narrative."""
-    if len(last_5_pts) < 2:
-        return "Sem jogos suficientes para análise de tendência."
-    
-    # Calculate trend
-    trend = sum(last_5_pts[-2:]) / 2 - sum(last_5_pts[:2]) / 2
-    
-    if trend > 5:
-        return "Está em excelente fase ofensiva, com crescimento consistente."
-    elif trend > 0:
-        return "Mostra leve tendência de melhora nas últimas partidas."
-    elif trend > -5:
-        return "Mantém regularidade nas últimas apresentações."
-    else:
-        return "Está em fase de declínio ofensivo nas últimas partidas."
+    return get_narratives().performance_trend(last_5_pts)
 
 def generate_fantasy_insight(pts, reb, ast, risk):
     """Generate fantasy basketball insight."""
-    total_fantasy_value = pts + reb*1.2 + ast*1.5
-    
-    if total_fantasy_value > 45:
-        value = "excelente valor para fantasy"
-    elif total_fantasy_value > 35:
-        value = "bom valor para fantasy"
-    elif total_fantasy_value > 25:
-        value = "valor moderado para fantasy"
-    else:
-        value = "valor limitado para fantasy"
-    
-    if risk == "baixo":
-        return f"{value} e representa uma escolha segura"
-    elif risk == "médio":
-        return f"{value}, mas com alguma inconsistência"
-    else:
-        return f"{value}, porém com risco elevado neste confronto"
+    return get_narratives().fantasy_insight(pts, reb, ast, risk)
+
+def format_player_data(player, player_info):
+    """Format a player's info into the nba_players.json record shape."""
+    import numpy as np
 
-def generate_all_players_data():
-    """Generate data for all active NBA players and save to a JSON file."""
+    # Get team logo
+    team_id = player_info['TEAM_ID']
+    team_name = player_info['TEAM_NAME']
+
+    # Get player stats (simplified)
+    player_stats = {
+        'ppg': np.random.uniform(2, 30),  # Mock stats - in real app, fetch actual stats
+        'rpg': np.random.uniform(1, 12),
+        'apg': np.random.uniform(0.5, 10)
+    }
+
+    return {
+        'id': player['id'],
+        'name': f"{player['first_name']} {player['last_name']}",
+        'position': player_info['POSITION'],
+        'teamName': team_name,
+        'teamLogo': f"https://cdn.nba.com/logos/nba/{team_id}/global/L/logo.svg",
+        'playerImage': f"https://cdn.nba.com/headshots/nba/latest/1040x760/{player['id']}.png",
+        'jerseyNumber': player_info.get('JERSEY', 0),
+        'stats': player_stats
+    }
+
+@instrument_stage("all_players")
+def generate_all_players_data(workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, retries=DEFAULT_RETRIES,
+                              fetch_player_info=None, ndjson=False, resume=False):
+    """
+    Generate data for all active NBA players and save to a JSON file.
+
+    Player info requests run concurrently through the fetch engine, bounded by
+    `workers` threads and a global `rps` limit. `fetch_player_info` defaults to
+    get_player_info and can be replaced by a stub that fakes endpoint latency.
+
+    Each player is written as soon as it is ready and the output file is put in
+    place atomically at the end (as NDJSON with `ndjson`). With `resume`, the
+    players already in the partial output of an interrupted run are skipped.
+    Returns the number of players saved.
+    """
     print("Gerando dados para todos os jogadores ativos da NBA...")
     all_players = get_all_active_players()
+    if fetch_player_info is None:
+        fetch_player_info = get_player_info
+
+    output_path = 'nba_players.ndjson' if ndjson else 'nba_players.json'
+    with StreamingJsonWriter(output_path, ndjson=ndjson, resume=resume) as writer:
+        if writer.existing_ids:
+            print(f"Retomando: {len(writer.existing_ids)} jogadores já salvos serão ignorados")
+            all_players = [player for player in all_players if player['id'] not in writer.existing_ids]
+
+        results = fetch_all(lambda player: fetch_player_info(player['id']), all_players,
+                            workers=workers, rps=rps, retries=retries)
+        for player, player_info, error in results:
+            try:
+                if error is not None:
+                    raise error
+                writer.write(format_player_data(player, player_info))
+                print(f"Dados gerados para: {player['first_name']} {player['last_name']}")
+            except Exception as e:
+                print(f"Erro ao processar jogador {player['id']}: {e}")
+                continue
     
-    formatted_players = []
-    for player in all_players:
-        try:
-            player_info = commonplayerinfo.CommonPlayerInfo(player_id=player['id']).get_normalized_dict()['CommonPlayerInfo'][0]
-            
-            # Get team logo
-            team_id = player_info['TEAM_ID']
-            team_name = player_info['TEAM_NAME']
-            team_abbr = player_info['TEAM_ABBREVIATION']
-            
-            # Get player stats (simplified)
-            player_stats = {
-                'ppg': np.random.uniform(2, 30),  # Mock stats - in real app, fetch actual stats
-                'rpg': np.random.uniform(1, 12),
-                'apg': np.random.uniform(0.5, 10)
+    print(f"Dados de {writer.count} jogadores salvos em {output_path}")
+    return writer.count
+
+def build_slate_games(matches):
+    """Map each team playing in the given matches to its upcoming game."""
+    team_games = {}
+    for match in matches:
+        home_id = match['homeTeam']['id']
+        away_id = match['awayTeam']['id']
+        if not home_id or not away_id:
+            continue
+        home_id, away_id = int(home_id), int(away_id)
+        for team_id, opponent_id, is_home in ((home_id, away_id, True), (away_id, home_id, False)):
+            opponent = find_team_by_id(opponent_id) or {}
+            team_games[team_id] = {
+                "game_id": match['id'],
+                "opponent": opponent.get('abbreviation', 'OPP'),
+                "opponent_id": opponent_id,
+                "date": match['date'],
+                "home": is_home,
             }
-            
-            formatted_players.append({
-                'id': player['id'],
-                'name': f"{player['first_name']} {player['last_name']}",
-                'position': player_info['POSITION'],
-                'teamName': team_name,
-                'teamLogo': f"https://cdn.nba.com/logos/nba/{team_id}/global/L/logo.svg",
-                'playerImage': f"https://cdn.nba.com/headshots/nba/latest/1040x760/{player['id']}.png",
-                'jerseyNumber': player_info.get('JERSEY', 0),
-                'stats': player_stats
-            })
-            print(f"Dados gerados para: {player['first_name']} {player['last_name']}")
+    return team_games
+
+def player_info_from_roster(roster_row, team):
+    """Build the player info fields used by the predictor from a team roster row."""
+    first_name, _, last_name = roster_row['PLAYER'].partition(' ')
+    return {
+        'FIRST_NAME': first_name,
+        'LAST_NAME': last_name,
+        'TEAM_ID': team.get('id', 0),
+        'TEAM_ABBREVIATION': team.get('abbreviation', 'NBA'),
+        'POSITION': roster_row.get('POSITION') or 'G',
+    }
+
+def predict_rostered(rostered, season, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, retries=DEFAULT_RETRIES,
+                     simulate=False, n_sims=DEFAULT_SIMULATIONS, lines=None):
+    """
+    Predict a list of (roster row, team, upcoming game) entries.
+
+    Game logs are fetched concurrently and every player's features (and
+    simulation, with `simulate`) are computed in one pass. Returns the
+    predictions in the order of `rostered`, without the players whose game
+    log could not be fetched or has no game in `season`.
+    """
+    import pandas as pd
+
+    # Fetch every player's game log concurrently and featurize them in one pass.
+    # Players whose log could not be fetched are left out instead of being
+    # predicted from an empty history.
+    game_logs = []
+    failed = set()
+    for (roster_row, _, _), games_df, error in fetch_all(
+            lambda entry: get_player_games(entry[0]['PLAYER_ID'], season), rostered,
+            workers=workers, rps=rps, retries=retries):
+        if error is not None:
+            print(f"Erro ao obter jogos do jogador {roster_row['PLAYER_ID']}: {error}")
+            failed.add(roster_row['PLAYER_ID'])
+        elif len(games_df):
+            game_logs.append(games_df)
+    rostered = [entry for entry in rostered if entry[0]['PLAYER_ID'] not in failed]
+    upcoming = pd.DataFrame([{
+        'PLAYER_ID': roster_row['PLAYER_ID'],
+        'OPPONENT': (find_team_by_id(upcoming_game['opponent_id']) or {}).get('abbreviation', 'OPP'),
+        'IS_HOME': upcoming_game['home'],
+        'GAME_DATE': upcoming_game['date'],
+    } for roster_row, _, upcoming_game in rostered], columns=['PLAYER_ID', 'OPPONENT', 'IS_HOME', 'GAME_DATE'])
+    logs = pd.concat(game_logs, ignore_index=True) if game_logs else pd.DataFrame()
+    histories = get_players_history(logs, upcoming)
+    simulations = {}
+    if simulate:
+        simulations = simulate_players(logs, histories, n_sims=n_sims, lines=lines)
+        print(f"Simulação: {n_sims} jogos simulados para {len(simulations)} jogadores")
+
+    predictions = []
+    pending_narratives = []
+    for roster_row, team, upcoming_game in rostered:
+        try:
+            prediction = predict_player_performance(
+                roster_row['PLAYER_ID'],
+                upcoming_game['opponent_id'],
+                season=season,
+                player_info=player_info_from_roster(roster_row, team),
+                upcoming_game=upcoming_game,
+                history=histories[roster_row['PLAYER_ID']],
+                simulation=simulations.get(roster_row['PLAYER_ID']),
+                n_sims=n_sims,
+                pending_narratives=pending_narratives,
+            )
         except Exception as e:
-            print(f"Erro ao processar jogador {player['id']}: {e}")
+            print(f"Erro ao prever jogador {roster_row.get('PLAYER_ID')}: {e}")
             continue
-    
-    # Save to JSON file
-    with open('nba_players.json', 'w') as f:
-        json.dump(formatted_players, f)
-    
-    print(f"Dados de {len(formatted_players)} jogadores salvos em nba_players.json")
-    return formatted_players
+        if prediction:
+            predictions.append(prediction)
+
+    details = get_narratives().details(narrative for _, narrative in pending_narratives)
+    for (prediction, _), detail in zip(pending_narratives, details):
+        prediction["previsao"]["detalhes"] = detail
+    return predictions
+
+def publish_predictions(predictions, output_path='nba_predictions.json'):
+    """Save predictions to Firestore in batches (when enabled) and to a JSON file."""
+    writer = None
+    if _firestore_enabled:
+        try:
+            writer = BatchedWriter(get_db())
+        except Exception as e:
+            print(f"Error initializing Firebase: {e}")
+
+    if writer is not None:
+        for prediction in predictions:
+            save_prediction_to_firebase(prediction, writer)
+        try:
+            writer.close()
+            print(f"Firestore: {writer.written} previsões gravadas em {writer.commits} lotes, "
+                  f"{writer.skipped} inalteradas ignoradas")
+            written = publish_summaries(get_db(), predictions)
+            print(f"Firestore: {written[GAME_SUMMARIES_COLLECTION]} resumos de jogos e "
+                  f"{written[TEAM_SUMMARIES_COLLECTION]} resumos de times gravados")
+        except Exception as e:
+            print(f"Erro ao salvar no Firebase: {e}")
+
+    with get_metrics().timed("nba_stage_seconds", stage="write_output"):
+        with open(output_path, 'w') as f:
+            json.dump(predictions, f, ensure_ascii=False)
+
+    print(f"Previsões de {len(predictions)} jogadores salvas em {output_path}")
+
+@instrument_stage("slate")
+def predict_slate(season=None, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, retries=DEFAULT_RETRIES,
+                  simulate=False, n_sims=DEFAULT_SIMULATIONS, lines=None):
+    """
+    Predict every rostered player in today's games in a single run.
+
+    The opponent, date and roster of each team are resolved once per team and
+    shared by all of its players. Rosters and game logs are fetched
+    concurrently and every player's features are computed in one pass. With
+    `simulate`, the whole slate is simulated in one batch as well. Nothing is
+    published when the scoreboard cannot be read.
+    """
+    print("Gerando previsões para todos os jogos do dia...")
+    season = season or current_season()
+    # Not get_all_matches: its mock game must never be predicted and published
+    try:
+        matches = fetch_live_matches()
+    except Exception as e:
+        print(f"Erro ao consultar o placar: {e}")
+        return []
+    team_games = build_slate_games(matches)
+
+    rostered = []
+    rosters = fetch_all(lambda team_id: get_team_roster(team_id, season), team_games,
+                        workers=workers, rps=rps, retries=retries)
+    for team_id, roster, error in rosters:
+        if error is not None:
+            print(f"Erro ao obter elenco do time {team_id}: {error}")
+            continue
+        team = find_team_by_id(team_id) or {}
+        rostered.extend((roster_row, team, team_games[team_id]) for roster_row in roster)
+
+    predictions = predict_rostered(rostered, season, workers=workers, rps=rps, retries=retries,
+                                   simulate=simulate, n_sims=n_sims, lines=lines)
+    publish_predictions(predictions)
+    return predictions
+
+def parse_shard(value):
+    """Parse a --shard value 'i/N' (i from 0 to N-1) into (i, N)."""
+    index, _, count = value.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard inválido: {value!r} (use i/N)")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard inválido: {value!r} (i deve estar entre 0 e N-1)")
+    return index, count
+
+def shard_path(index, count, output_path='nba_predictions.json'):
+    """Output file of one shard of a league run."""
+    base, ext = os.path.splitext(output_path)
+    return f"{base}.shard-{index}-of-{count}{ext}"
+
+def build_league_entries(season, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, retries=DEFAULT_RETRIES):
+    """
+    Resolve the team and next game of every active player.
+
+    Teams come from the 30 team rosters and games from the local schedule,
+    so every shard and worker sees the same entries, ordered by player ID.
+    """
+    active_ids = {player['id'] for player in get_all_active_players()}
+    entries = []
+    rosters = fetch_all(lambda team_id: get_team_roster(team_id, season), list(_team_index()[0]),
+                        workers=workers, rps=rps, retries=retries)
+    for team_id, roster, error in rosters:
+        if error is not None:
+            print(f"Erro ao obter elenco do time {team_id}: {error}")
+            continue
+        upcoming_game = get_upcoming_games(team_id, workers=workers, rps=rps, retries=retries)
+        if not upcoming_game:
+            continue
+        team = find_team_by_id(team_id) or {}
+        entries.extend((roster_row, team, upcoming_game) for roster_row in roster
+                       if roster_row['PLAYER_ID'] in active_ids)
+    entries.sort(key=lambda entry: entry[0]['PLAYER_ID'])
+    return entries
+
+def _predict_rostered_worker(*args):
+    """Run predict_rostered in a league worker process and return its predictions and metrics."""
+    metrics = get_metrics()
+    metrics.reset()
+    return predict_rostered(*args), metrics.snapshot()
+
+@instrument_stage("league")
+def predict_league(season=None, processes=None, shard=None, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS,
+                   retries=DEFAULT_RETRIES, simulate=False, n_sims=DEFAULT_SIMULATIONS, lines=None):
+    """
+    Predict every active player with a team and an upcoming game.
+
+    The players are split round-robin across `processes` worker processes
+    (default: one per core). With `shard=(i, N)` only the i-th of N shards is
+    predicted, so a refresh can be spread over several machines; each shard
+    is written to its own file and merge_prediction_shards combines them.
+    Workers share the on-disk response cache, game log store and models, and
+    split the `rps` budget between them. Their metrics are merged into this
+    process's registry.
+    """
+    import multiprocessing
+
+    season = season or current_season()
+    print(f"Gerando previsões para todos os jogadores ativos ({season})...")
+    entries = build_league_entries(season, workers=workers, rps=rps, retries=retries)
+    if shard is not None:
+        entries = entries[shard[0]::shard[1]]
+        print(f"Shard {shard[0]}/{shard[1]}: {len(entries)} jogadores")
+
+    processes = max(1, min(processes or os.cpu_count() or 1, len(entries) or 1))
+    if processes == 1:
+        predictions = predict_rostered(entries, season, workers=workers, rps=rps, retries=retries,
+                                       simulate=simulate, n_sims=n_sims, lines=lines)
+    else:
+        chunks = [entries[i::processes] for i in range(processes)]
+        worker_config = dict(_run_config, firestore=False)
+        worker_rps = rps / processes if rps else rps
+        with multiprocessing.get_context('spawn').Pool(processes, initializer=configure_run,
+                                                       initargs=(worker_config,)) as pool:
+            results = pool.starmap(_predict_rostered_worker, [
+                (chunk, season, workers, worker_rps, retries, simulate, n_sims, lines) for chunk in chunks
+            ])
+        for _, snapshot in results:
+            get_metrics().merge(snapshot)
+        order = {entry[0]['PLAYER_ID']: i for i, entry in enumerate(entries)}
+        predictions = sorted((prediction for result, _ in results for prediction in result),
+                             key=lambda prediction: order[prediction['jogador_id']])
+        print(f"{processes} processos concluídos")
+
+    if shard is not None and shard[1] > 1:
+        path = shard_path(*shard)
+        with open(path, 'w') as f:
+            json.dump(predictions, f, ensure_ascii=False)
+        print(f"Previsões de {len(predictions)} jogadores salvas em {path}")
+    else:
+        publish_predictions(predictions)
+    return predictions
+
+def merge_prediction_shards(count, output_path='nba_predictions.json'):
+    """Combine the files of N league shards into one output and one Firestore write."""
+    predictions = []
+    for index in range(count):
+        path = shard_path(index, count, output_path)
+        if not os.path.exists(path):
+            print(f"Erro: arquivo do shard {index}/{count} não encontrado ({path})")
+            return None
+        with open(path) as f:
+            predictions.extend(json.load(f))
+    predictions.sort(key=lambda prediction: prediction['jogador_id'])
+    publish_predictions(predictions, output_path)
+    return predictions
 
-def generate_all_matches_data():
+@instrument_stage("train")
+def train_prediction_models(seasons=None, force=False, workers=DEFAULT_WORKERS, rps=DEFAULT_RPS,
+                            retries=DEFAULT_RETRIES):
+    """Fit the PTS/REB/AST models on the game logs of all active players."""
+    import pandas as pd
+
+    if seasons is None:
+        seasons = ['2021-22', '2022-23', '2023-24']
+
+    print(f"Treinando modelos com as temporadas {', '.join(seasons)}...")
+    requests = [(player['id'], season) for player in get_all_active_players() for season in seasons]
+    game_logs = []
+    for (player_id, season), games_df, error in fetch_all(
+            lambda request: get_player_games(*request), requests,
+            workers=workers, rps=rps, retries=retries):
+        if error is not None:
+            print(f"Erro ao obter jogos do jogador {player_id} em {season}: {error}")
+        elif len(games_df):
+            game_logs.append(games_df)
+
+    if not game_logs:
+        print("Nenhum jogo encontrado para treinar os modelos.")
+        return None
+    return train_models(pd.concat(game_logs, ignore_index=True), force=force)
+
+@instrument_stage("sync_game_logs")
+def sync_game_logs(season='2023-24', workers=DEFAULT_WORKERS, rps=DEFAULT_RPS, retries=DEFAULT_RETRIES):
+    """Append the new games of every active player and every team to the local store."""
+    print(f"Atualizando game logs da temporada {season}...")
+    store = get_store()
+    entities = ([(TEAM, team_id) for team_id in _team_index()[0]]
+                + [(PLAYER, player['id']) for player in get_all_active_players()])
+    fetchers = {PLAYER: fetch_player_game_log, TEAM: fetch_team_game_log}
+
+    def sync(entity):
+        kind, entity_id = entity
+        return store.sync(kind, entity_id, season, lambda date_from: fetchers[kind](entity_id, season, date_from))
+
+    new_games = 0
+    for (kind, entity_id), added, error in fetch_all(sync, entities, workers=workers, rps=rps, retries=retries):
+        if error is not None:
+            print(f"Erro ao atualizar jogos de {kind} {entity_id}: {error}")
+        else:
+            new_games += added
+    print(f"{new_games} jogos novos armazenados para {len(entities)} jogadores e times")
+    for kind in (PLAYER, TEAM):
+        if store.export_columns(kind):
+            print(f"Tabela colunar de {kind} atualizada em {store.columnar_path(kind)}")
+    return new_games
+
+@instrument_stage("build_matchups")
+def build_matchups(seasons=None, path=DEFAULT_MATCHUP_PATH):
+    """
+    Precompute the player vs opponent matrix from the game logs in the local store.
+
+    Uses every stored season unless `seasons` is given. Run --sync-games first
+    to ingest the game logs.
+    """
+    print(f"Calculando a matriz jogador x adversário ({', '.join(seasons) if seasons else 'todas as temporadas'})...")
+    logs = get_store().read_columns(PLAYER, LOG_COLUMNS, seasons)
+    team_ids = {abbreviation: team['id'] for abbreviation, team in _team_index()[1].items()}
+    matrix = build_matchup_matrix(logs, team_ids)
+    matrix.save(path)
+    configure_matchups(path)
+    print(f"Matriz de {len(matrix.player_ids)} jogadores x {len(matrix.team_ids)} times "
+          f"({int(matrix.counts.sum())} jogos) salva em {path}")
+    return matrix
+
+def generate_all_matches_data(ndjson=False):
     """Generate data for all NBA matches and save to a JSON file."""
     print("Gerando dados para todas as partidas da NBA...")
     all_matches = get_all_matches()
     
     # Save to JSON file
-    with open('nba_matches.json', 'w') as f:
-        json.dump(all_matches, f)
+    output_path = 'nba_matches.ndjson' if ndjson else 'nba_matches.json'
+    with StreamingJsonWriter(output_path, ndjson=ndjson) as writer:
+        for match in all_matches:
+            writer.write(match)
     
-    print(f"Dados de {len(all_matches)} partidas salvos em nba_matches.json")
+    print(f"Dados de {len(all_matches)} partidas salvos em {output_path}")
     return all_matches
 
-def save_prediction_to_firebase(prediction):
-    """Save prediction to Firebase Firestore."""
-    if not prediction:
+def watch_matches(live_interval=LIVE_INTERVAL, idle_interval=IDLE_INTERVAL, max_polls=None):
+    """
+    Keep nba_matches.json (and the partidas collection) up to date with the live scoreboard.
+
+    Only games whose score, period, clock or status changed are published.
+    """
+    print("Monitorando o placar ao vivo...")
+    publishers = [JsonFilePublisher('nba_matches.json')]
+    if _firestore_enabled:
+        try:
+            writer = BatchedWriter(get_db(), collection=MATCHES_COLLECTION, state_path=None, merge=True)
+            publishers.append(FirestorePublisher(writer))
+        except Exception as e:
+            print(f"Error initializing Firebase: {e}")
+    return poll_scoreboard(fetch_live_matches, publishers, live_interval=live_interval,
+                           idle_interval=idle_interval, max_polls=max_polls)
+
+@instrument_stage("firestore_save")
+def save_prediction_to_firebase(prediction, writer=None):
+    """
+    Save prediction to Firebase Firestore.
+
+    With a BatchedWriter the write is queued and committed with other
+    predictions in one batch; otherwise it is written immediately.
+    """
+    if not prediction or not _firestore_enabled:
         return False
     
     try:
         player_id = prediction["jogador_id"]
-        doc_ref = db.collection("previsoes").document(str(player_id))
+        if writer is not None:
+            writer.set(player_id, prediction)
+            return True
+        doc_ref = get_db().collection(PREDICTIONS_COLLECTION).document(str(player_id))
         doc_ref.set(prediction)
         print(f"Previsão para {prediction['jogador']} salva com sucesso no Firestore.")
         return True
@@ -538,20 +1273,201 @@ def save_prediction_to_firebase(prediction):
         print(f"Erro ao salvar no Firebase: {e}")
         return False
 
-def main():
+def parse_args(argv=None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="NBA Player Performance Predictor")
+    # Default to LeBron James if no player ID is provided
+    parser.add_argument("player_id", nargs="?", type=int, default=2544,
+                        help="ID do jogador da NBA (padrão: 2544, LeBron James)")
+    parser.add_argument("--all-players", action="store_true",
+                        help="gera nba_players.json para todos os jogadores ativos")
+    parser.add_argument("--all-matches", action="store_true",
+                        help="gera nba_matches.json com as partidas do dia")
+    parser.add_argument("--watch-matches", action="store_true",
+                        help="monitora o placar ao vivo e publica só as partidas que mudaram")
+    parser.add_argument("--live-interval", type=float, default=LIVE_INTERVAL,
+                        help="segundos entre consultas com jogos em andamento")
+    parser.add_argument("--idle-interval", type=float, default=IDLE_INTERVAL,
+                        help="segundos entre consultas sem jogos em andamento")
+    parser.add_argument("--slate", action="store_true",
+                        help="gera previsões para todos os jogadores dos jogos do dia")
+    parser.add_argument("--league", action="store_true",
+                        help="gera previsões para todos os jogadores ativos com jogo próximo, em vários processos")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="processos usados por --league (padrão: um por núcleo)")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="com --league, processa só o shard i de N (i/N, i de 0 a N-1)")
+    parser.add_argument("--merge-shards", type=int, default=None, metavar="N",
+                        help="junta os arquivos dos N shards em nba_predictions.json e grava no Firestore")
+    parser.add_argument("--season", default=None,
+                        help="temporada usada por --slate, --league, --sync-games e pela previsão de um "
+                             "jogador (padrão: temporada atual)")
+    parser.add_argument("--sync-games", action="store_true",
+                        help="baixa apenas os jogos novos de todos os jogadores e times")
+    parser.add_argument("--gamelog-path", default=DEFAULT_STORE_PATH,
+                        help="arquivo SQLite do armazenamento local de game logs")
+    parser.add_argument("--sync-schedule", action="store_true",
+                        help="baixa o calendário da liga dos próximos dias para o cache local")
+    parser.add_argument("--schedule-days", type=int, default=DEFAULT_SCHEDULE_DAYS,
+                        help="quantos dias à frente --sync-schedule busca")
+    parser.add_argument("--schedule-path", default=DEFAULT_SCHEDULE_PATH,
+                        help="arquivo JSON do calendário local")
+    parser.add_argument("--build-matchups", action="store_true",
+                        help="pré-calcula a matriz jogador x adversário a partir dos game logs armazenados")
+    parser.add_argument("--matchup-seasons", nargs="+", default=None,
+                        help="temporadas usadas por --build-matchups (padrão: todas as armazenadas)")
+    parser.add_argument("--matchup-path", default=DEFAULT_MATCHUP_PATH,
+                        help="diretório da matriz jogador x adversário")
+    parser.add_argument("--train", action="store_true",
+                        help="treina os modelos de previsão com os game logs históricos")
+    parser.add_argument("--train-seasons", nargs="+", default=None,
+                        help="temporadas usadas no treino (padrão: 2021-22 2022-23 2023-24)")
+    parser.add_argument("--force-train", action="store_true",
+                        help="treina mesmo sem jogos novos desde o último modelo")
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH,
+                        help="arquivo dos modelos treinados")
+    parser.add_argument("--simulate", action="store_true",
+                        help="simula a distribuição de PTS/REB/AST (Monte Carlo) e deriva o risco da variância")
+    parser.add_argument("--sims", type=int, default=DEFAULT_SIMULATIONS,
+                        help="número de jogos simulados por jogador")
+    parser.add_argument("--lines", default=None,
+                        help="arquivo JSON com linhas por jogador, ex.: {\"2544\": {\"PTS\": 24.5}}")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="grava --all-players/--all-matches em NDJSON (um registro por linha)")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma um --all-players interrompido, pulando jogadores já salvos")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="número de requisições simultâneas à API")
+    parser.add_argument("--rps", type=float, default=DEFAULT_RPS,
+                        help="limite global de requisições por segundo (0 = sem limite)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="tentativas extras por requisição com falha")
+    parser.add_argument("--metrics-out", default=None,
+                        help="grava as métricas da execução (JSON se terminar em .json, senão formato Prometheus)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="expõe as métricas em http://127.0.0.1:PORTA/metrics durante a execução")
+    parser.add_argument("--no-firestore", action="store_true",
+                        help="não grava previsões no Firestore (não inicializa o Firebase)")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH,
+                        help="arquivo SQLite do cache de respostas da API")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="desativa o cache de respostas da API")
+    return parser.parse_args(argv)
+
+def print_cache_stats():
+    """Print response cache hit/miss counters for this run."""
+    cache = get_cache()
+    if cache is None:
+        return
+    stats = cache.stats()
+    print(f"Cache de respostas: {stats['hits']} acertos, {stats['misses']} falhas")
+    for endpoint, counts in stats['endpoints'].items():
+        print(f"  {endpoint}: {counts['hits']} acertos, {counts['misses']} falhas")
+
+def print_metrics_report():
+    """Print the time spent per stage and per nba_api endpoint in this run."""
+    snapshot = get_metrics().snapshot()
+    counters = {}
+    for counter in snapshot['counters']:
+        key = (counter['name'], counter['labels'].get('endpoint'))
+        counters[key] = counters.get(key, 0) + counter['value']
+    sections = (("Tempo por etapa", "nba_stage_seconds", 'stage'),
+                ("Chamadas à API", "nba_api_call_seconds", 'endpoint'))
+    for title, name, label in sections:
+        histograms = [histogram for histogram in snapshot['histograms'] if histogram['name'] == name]
+        if not histograms:
+            continue
+        print(f"{title}:")
+        for histogram in histograms:
+            label_value = histogram['labels'][label]
+            line = f"  {label_value}: {histogram['count']} chamadas, {histogram['sum']:.3f} s"
+            fetched = counters.get(("nba_api_response_bytes_total", label_value))
+            if label == 'endpoint' and fetched:
+                line += f", {fetched / 1e6:.2f} MB"
+            print(line)
+    retries = counters.get(("nba_fetch_retries_total", None), 0)
+    if retries:
+        print(f"Retentativas: {retries}")
+
+def run_config(args):
+    """Collect the storage settings of a run, shared with its worker processes."""
+    return {
+        'cache_path': args.cache_path,
+        'cache_enabled': not args.no_cache,
+        'model_path': args.model_path,
+        'firestore': not args.no_firestore,
+        'gamelog_path': args.gamelog_path,
+        'matchup_path': args.matchup_path,
+        'schedule_path': args.schedule_path,
+    }
+
+def configure_run(config):
+    """Point the cache, models, Firestore and local stores of this process at a run's settings."""
+    global _run_config
+    _run_config = dict(config)
+    configure_cache(config['cache_path'], enabled=config['cache_enabled'])
+    configure_models(config['model_path'])
+    configure_firestore(config['firestore'])
+    configure_store(config['gamelog_path'])
+    configure_matchups(config['matchup_path'])
+    configure_schedule(config['schedule_path'])
+
+def main(argv=None):
     """Main function to run the predictor for a specific player."""
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--all-players":
-            generate_all_players_data()
-            return
-        elif sys.argv[1] == "--all-matches":
-            generate_all_matches_data()
-            return
-        else:
-            player_id = int(sys.argv[1])
-    else:
-        # Default to LeBron James if no player ID is provided
-        player_id = 2544  # LeBron James
+    args = parse_args(argv)
+    if args.metrics_port:
+        get_metrics().serve(args.metrics_port)
+        print(f"Métricas em http://127.0.0.1:{args.metrics_port}/metrics")
+    configure_run(run_config(args))
+    try:
+        run(args)
+    finally:
+        print_cache_stats()
+        print_metrics_report()
+        if args.metrics_out:
+            get_metrics().write(args.metrics_out)
+            print(f"Métricas salvas em {args.metrics_out}")
+
+def run(args):
+    """Run the command selected on the command line."""
+    lines = load_lines(args.lines) if args.lines else None
+    if args.all_players:
+        generate_all_players_data(workers=args.workers, rps=args.rps, retries=args.retries,
+                                  ndjson=args.ndjson, resume=args.resume)
+        return
+    elif args.all_matches:
+        generate_all_matches_data(ndjson=args.ndjson)
+        return
+    elif args.sync_games:
+        sync_game_logs(season=args.season or current_season(), workers=args.workers, rps=args.rps,
+                       retries=args.retries)
+        return
+    elif args.sync_schedule:
+        sync_schedule(days=args.schedule_days, workers=args.workers, rps=args.rps, retries=args.retries)
+        return
+    elif args.build_matchups:
+        build_matchups(seasons=args.matchup_seasons, path=args.matchup_path)
+        return
+    elif args.train:
+        train_prediction_models(seasons=args.train_seasons, force=args.force_train,
+                                workers=args.workers, rps=args.rps, retries=args.retries)
+        return
+    elif args.watch_matches:
+        watch_matches(live_interval=args.live_interval, idle_interval=args.idle_interval)
+        return
+    elif args.merge_shards:
+        merge_prediction_shards(args.merge_shards)
+        return
+    elif args.league:
+        predict_league(season=args.season, processes=args.processes, shard=args.shard, workers=args.workers,
+                       rps=args.rps, retries=args.retries, simulate=args.simulate, n_sims=args.sims, lines=lines)
+        return
+    elif args.slate:
+        predict_slate(season=args.season, workers=args.workers, rps=args.rps, retries=args.retries,
+                      simulate=args.simulate, n_sims=args.sims, lines=lines)
+        return
+
+    player_id = args.player_id
     
     try:
         # Get player info
@@ -559,7 +1475,8 @@ def main():
         print(f"Gerando previsão para: {player_info['FIRST_NAME']} {player_info['LAST_NAME']}")
         
         # Get upcoming opponent
-        upcoming_game = get_upcoming_games(player_info['TEAM_ID'])
+        upcoming_game = get_upcoming_games(player_info['TEAM_ID'], workers=args.workers, rps=args.rps,
+                                           retries=args.retries)
         if not upcoming_game:
             print("Nenhum jogo próximo encontrado.")
             return
@@ -567,7 +1484,9 @@ def main():
         opponent_id = upcoming_game['opponent_id']
         
         # Generate prediction
-        prediction = predict_player_performance(player_id, opponent_id)
+        prediction = predict_player_performance(player_id, opponent_id, season=args.season or current_season(),
+                                                player_info=player_info, upcoming_game=upcoming_game,
+                                                simulate=args.simulate, n_sims=args.sims, lines=lines)
         
         if prediction:
             # Save to Firebase
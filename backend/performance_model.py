@@ -0,0 +1,134 @@
+"""
+Performance Model
+-----------------
+Fits one linear regression per stat (PTS/REB/AST) on the rolling features
+of historical game logs and saves the fitted models together with a version
+number, the feature-schema hash and a fingerprint of the training games.
+
+The prediction path loads the models once per process and scores a whole
+feature matrix with one batched predict() call per stat. Retraining is
+skipped when no new games have arrived since the saved models were fitted.
+"""
+
+import hashlib
+import os
+import pickle
+from datetime import datetime
+
+DEFAULT_MODEL_PATH = os.environ.get("NBA_MODEL_PATH", "nba_models.pkl")
+
+
+def schema_hash(columns=None, stats=None):
+    """Hash of the feature columns and targets the models were fitted on."""
+    from features import STATS, FEATURE_COLUMNS
+
+    columns = FEATURE_COLUMNS if columns is None else columns
+    stats = STATS if stats is None else stats
+    payload = "|".join(columns) + "->" + "|".join(stats)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def data_fingerprint(game_ids):
+    """Fingerprint of the set of games used for training."""
+    digest = hashlib.sha256()
+    for game_id in sorted({str(g) for g in game_ids}):
+        digest.update(game_id.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+_loaded = {}
+_model_path = DEFAULT_MODEL_PATH
+
+
+def configure_models(path=DEFAULT_MODEL_PATH):
+    """Select the model file used by the prediction path."""
+    global _model_path
+    _model_path = path
+
+
+def read_model_file(path=DEFAULT_MODEL_PATH):
+    """Return the saved model bundle, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def train_models(logs, path=None, force=False):
+    """
+    Fit per-stat models on stacked game logs and save them to `path`
+    (the configured model file by default).
+
+    Returns the saved bundle, or the existing one unchanged when it was
+    trained on the same games with the same feature schema.
+    """
+    from sklearn.linear_model import LinearRegression
+    from features import STATS, build_features
+
+    path = path or _model_path
+    feature_set = build_features(logs)
+    fingerprint = data_fingerprint(feature_set.keys['GAME_ID'].astype(str) + ":"
+                                   + feature_set.keys['PLAYER_ID'].astype(str))
+    current_schema = schema_hash(feature_set.columns)
+
+    existing = read_model_file(path)
+    if (not force and existing is not None and existing["schema_hash"] == current_schema
+            and existing["data_fingerprint"] == fingerprint):
+        print(f"Nenhum jogo novo desde o modelo v{existing['version']}; treino ignorado.")
+        return existing
+
+    # Only games with at least one earlier game have meaningful features
+    has_history = feature_set.matrix[:, feature_set.columns.index('GAMES_PLAYED')] > 0
+    matrix = feature_set.matrix[has_history]
+    targets = feature_set.targets[has_history]
+    if not len(matrix):
+        raise ValueError("Não há jogos suficientes para treinar o modelo.")
+
+    print(f"Treinando modelos com {len(matrix)} jogos...")
+    models = {stat: LinearRegression().fit(matrix, targets[:, j]) for j, stat in enumerate(STATS)}
+
+    bundle = {
+        "version": (existing["version"] + 1) if existing else 1,
+        "schema_hash": current_schema,
+        "data_fingerprint": fingerprint,
+        "columns": list(feature_set.columns),
+        "stats": list(STATS),
+        "models": models,
+        "n_games": int(len(matrix)),
+        "trained_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    _loaded.pop(path, None)
+    print(f"Modelo v{bundle['version']} salvo em {path}")
+    return bundle
+
+
+def get_models():
+    """
+    Return the fitted model bundle, loading it once per process.
+
+    Returns None when no models have been trained yet or when they were
+    trained on a different feature schema.
+    """
+    path = _model_path
+    if path not in _loaded:
+        bundle = read_model_file(path)
+        if bundle is not None and bundle["schema_hash"] != schema_hash():
+            print(f"Modelo em {path} usa outro esquema de features; treine novamente com --train.")
+            bundle = None
+        _loaded[path] = bundle
+    return _loaded[path]
+
+
+def predict_stats(bundle, matrix):
+    """Predict every stat for all rows of a feature matrix at once."""
+    import numpy as np
+
+    if not len(matrix):
+        return np.empty((0, len(bundle["stats"])), dtype=np.float32)
+    predictions = np.column_stack([bundle["models"][stat].predict(matrix) for stat in bundle["stats"]])
+    return np.clip(predictions, 0, None).astype(np.float32)
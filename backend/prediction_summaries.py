@@ -0,0 +1,123 @@
+"""
+Prediction Summary Documents
+----------------------------
+Aggregates the per-player predictions into one Firestore document per game
+and one per team. A page showing a game or a team then reads a single
+document instead of one per player.
+
+Every summary carries an ETag (the hash of its content) and a version that
+only increases when the content changes. An index document in each
+collection lists the current ETag of every summary, so a client that
+remembers the ETags it has seen reads the index and fetches only the
+summaries that changed. Summaries whose ETag is unchanged are not
+rewritten.
+"""
+
+import json
+import os
+
+from firestore_batch import BatchedWriter, content_hash
+
+GAME_SUMMARIES_COLLECTION = "previsoes_jogos"
+TEAM_SUMMARIES_COLLECTION = "previsoes_times"
+INDEX_DOCUMENT = "indice"
+DEFAULT_VERSIONS_PATH = os.environ.get("NBA_SUMMARY_VERSIONS_PATH", "firestore_summaries.json")
+
+
+def build_summaries(predictions):
+    """
+    Group predictions by game and by team.
+
+    Returns {collection: {doc_id: document}}. Predictions without a game ID
+    are left out of the game summaries, and predictions without a team ID
+    are left out of the team summaries.
+    """
+    games = {}
+    teams = {}
+    for prediction in sorted(predictions, key=lambda prediction: (prediction.get('time_id') or 0,
+                                                                  prediction['jogador_id'])):
+        game_id = prediction.get('jogo_id')
+        team_id = prediction.get('time_id')
+        if game_id:
+            game = games.setdefault(str(game_id), {
+                'jogo_id': str(game_id),
+                'data_jogo': prediction['data_jogo'],
+                'times': [],
+                'previsoes': [],
+            })
+            if team_id and team_id not in game['times']:
+                game['times'].append(team_id)
+            game['previsoes'].append(prediction)
+        if team_id:
+            team = teams.setdefault(str(team_id), {
+                'time_id': team_id,
+                'jogo_id': str(game_id) if game_id else None,
+                'proximo_jogo': prediction['proximo_jogo'],
+                'data_jogo': prediction['data_jogo'],
+                'previsoes': [],
+            })
+            team['previsoes'].append(prediction)
+    return {GAME_SUMMARIES_COLLECTION: games, TEAM_SUMMARIES_COLLECTION: teams}
+
+
+class SummaryVersions:
+    """ETag and version of every summary document written so far."""
+
+    def __init__(self, versions=None, path=DEFAULT_VERSIONS_PATH):
+        self.versions = versions or {}
+        self.path = path
+
+    @classmethod
+    def load(cls, path=DEFAULT_VERSIONS_PATH):
+        """Load the versions recorded by a previous run."""
+        if not path or not os.path.exists(path):
+            return cls(path=path)
+        with open(path) as f:
+            return cls(json.load(f), path)
+
+    def save(self):
+        """Atomically save the versions for the next run."""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.versions, f)
+        os.replace(tmp_path, self.path)
+
+    def stamp(self, collection, doc_id, document):
+        """
+        Return the document with its 'etag' and 'versao' fields, and whether
+        its content changed since the recorded version.
+        """
+        etag = content_hash(document)
+        recorded = self.versions.setdefault(collection, {}).get(doc_id)
+        changed = recorded is None or recorded['etag'] != etag
+        version = (recorded['versao'] if recorded else 0) + changed
+        self.versions[collection][doc_id] = {'etag': etag, 'versao': version}
+        return dict(document, etag=etag, versao=version), changed
+
+
+def publish_summaries(db, predictions, versions_path=DEFAULT_VERSIONS_PATH):
+    """
+    Write the game and team summaries of a set of predictions, and the index
+    of each collection, skipping documents whose ETag is unchanged.
+
+    Returns {collection: documents written}.
+    """
+    versions = SummaryVersions.load(versions_path)
+    written = {}
+    for collection, documents in build_summaries(predictions).items():
+        index = {}
+        with BatchedWriter(db, collection=collection, state_path=None) as writer:
+            for doc_id, document in documents.items():
+                document, changed = versions.stamp(collection, doc_id, document)
+                index[doc_id] = {'etag': document['etag'], 'versao': document['versao'],
+                                 'data_jogo': document['data_jogo']}
+                if changed:
+                    writer.set(doc_id, document)
+            index_document, changed = versions.stamp(collection, INDEX_DOCUMENT, {'documentos': index})
+            if changed:
+                writer.set(INDEX_DOCUMENT, index_document)
+        written[collection] = writer.written
+    versions.save()
+    return written
@@ -0,0 +1,197 @@
+"""
+Response Cache
+--------------
+Shared caching layer for the nba_api endpoint wrappers. Responses are keyed
+by endpoint name and call parameters and kept in an in-process LRU in front
+of a persistent SQLite store, so re-running predictions for the same slate
+costs almost no network time.
+
+Entries expire per endpoint: data for finished seasons never changes and is
+kept for a long time, while current-season data is refreshed often.
+"""
+
+import functools
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from metrics import get_metrics
+
+DEFAULT_CACHE_PATH = os.environ.get("NBA_CACHE_PATH", "nba_cache.sqlite3")
+DEFAULT_MEMORY_ENTRIES = 512
+
+# Time-to-live values, in seconds
+FINISHED_SEASON_TTL = 30 * 24 * 3600
+CURRENT_SEASON_TTL = 3600
+PLAYER_INFO_TTL = 12 * 3600
+
+
+def current_season(today=None):
+    """Return the NBA season string (e.g. '2023-24') in progress on a date."""
+    today = today or datetime.now()
+    start_year = today.year if today.month >= 10 else today.year - 1
+    return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+
+def season_ttl(season):
+    """Return a long TTL for finished seasons and a short one for the current season."""
+    if season and season < current_season():
+        return FINISHED_SEASON_TTL
+    return CURRENT_SEASON_TTL
+
+
+def make_key(endpoint, params):
+    """Build a stable cache key from an endpoint name and its parameters."""
+    return f"{endpoint}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class ResponseCache:
+    """In-process LRU backed by a persistent SQLite store, with hit/miss counters."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MEMORY_ENTRIES, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = Counter()
+        self.misses = Counter()
+        self._clock = clock
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, endpoint TEXT, value BLOB, expires_at REAL)"
+            )
+            self._conn.commit()
+
+    def get(self, endpoint, params):
+        """Return (found, value) for a cached response that has not expired."""
+        key = make_key(endpoint, params)
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.hits[endpoint] += 1
+                return True, entry[0]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = pickle.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self.hits[endpoint] += 1
+                    return True, value
+
+            self.misses[endpoint] += 1
+            return False, None
+
+    def set(self, endpoint, params, value, ttl):
+        """Store a response for `ttl` seconds in both cache tiers."""
+        key = make_key(endpoint, params)
+        expires_at = self._clock() + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, endpoint, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, endpoint, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at),
+                )
+                self._conn.commit()
+
+    def purge_expired(self):
+        """Delete expired entries from the persistent store."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (self._clock(),))
+                self._conn.commit()
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters, overall and per endpoint."""
+        with self._lock:
+            endpoints = sorted(set(self.hits) | set(self.misses))
+            return {
+                "hits": sum(self.hits.values()),
+                "misses": sum(self.misses.values()),
+                "endpoints": {
+                    name: {"hits": self.hits[name], "misses": self.misses[name]}
+                    for name in endpoints
+                },
+            }
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+_cache = None
+_cache_enabled = os.environ.get("NBA_CACHE_DISABLED", "") == ""
+
+
+def configure_cache(path=DEFAULT_CACHE_PATH, enabled=True, max_entries=DEFAULT_MEMORY_ENTRIES):
+    """Replace the shared cache, e.g. to point at another file or disable it."""
+    global _cache, _cache_enabled
+    _cache_enabled = enabled
+    _cache = ResponseCache(path, max_entries) if enabled else None
+    return _cache
+
+
+def get_cache():
+    """Return the shared cache, creating it on first use (None when disabled)."""
+    global _cache
+    if _cache is None and _cache_enabled:
+        _cache = ResponseCache()
+    return _cache
+
+
+def cached(endpoint, ttl):
+    """
+    Cache a wrapper's return value under `endpoint` and its call parameters.
+
+    `ttl` is a number of seconds or a callable that receives the bound
+    parameters as a dict and returns one. Cached values are shared between
+    callers and must not be mutated.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+
+            found, value = cache.get(endpoint, params)
+            get_metrics().inc("nba_cache_requests_total", endpoint=endpoint, result="hit" if found else "miss")
+            if found:
+                return value
+            value = func(*args, **kwargs)
+            cache.set(endpoint, params, value, ttl(params) if callable(ttl) else ttl)
+            return value
+
+        return wrapper
+
+    return decorator
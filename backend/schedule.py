@@ -0,0 +1,111 @@
+"""
+League Schedule Cache
+---------------------
+Local copy of the league schedule, saved as JSON and indexed by team ID
+with each team's games sorted by date, so the next game of a team is found
+with a binary search. The schedule is filled day by day from the
+scoreboard; a day that is fetched again replaces the games stored for it,
+so postponed or moved games do not linger. After a refresh that fetched
+nothing, the schedule is not considered stale again for a few minutes, so
+lookups do not retry the scoreboard on every call.
+"""
+
+import bisect
+import json
+import os
+import time
+
+DEFAULT_SCHEDULE_PATH = os.environ.get("NBA_SCHEDULE_PATH", "nba_schedule.json")
+DEFAULT_SCHEDULE_DAYS = 14
+SCHEDULE_MAX_AGE = 6 * 3600
+SCHEDULE_RETRY_AFTER = 10 * 60
+
+
+class Schedule:
+    """League games ({game_id, date, home_team_id, away_team_id}) indexed by team and date."""
+
+    def __init__(self, games=(), updated_at=None, clock=time.time):
+        self.games = {game['game_id']: game for game in games}
+        self.updated_at = updated_at
+        self.failed_at = None
+        self._clock = clock
+        self._build_index()
+
+    def _build_index(self):
+        entries = {}
+        for game in sorted(self.games.values(), key=lambda game: (game['date'], game['game_id'])):
+            for team_id, opponent_id, home in ((game['home_team_id'], game['away_team_id'], True),
+                                               (game['away_team_id'], game['home_team_id'], False)):
+                entries.setdefault(int(team_id), []).append(
+                    (game['date'], {'game_id': game['game_id'], 'date': game['date'],
+                                    'opponent_id': int(opponent_id), 'home': home}))
+        self._index = {team_id: ([date for date, _ in team_games], [game for _, game in team_games])
+                       for team_id, team_games in entries.items()}
+
+    def next_game(self, team_id, on_or_after):
+        """Return the team's first game on or after a 'YYYY-MM-DD' date, or None."""
+        dates, team_games = self._index.get(int(team_id), ((), ()))
+        position = bisect.bisect_left(dates, on_or_after)
+        return team_games[position] if position < len(team_games) else None
+
+    def update(self, dates, games):
+        """Replace the games of the fetched dates with the given ones."""
+        dates = set(dates)
+        self.games = {game_id: game for game_id, game in self.games.items() if game['date'] not in dates}
+        self.games.update((game['game_id'], game) for game in games)
+        self.updated_at = self._clock()
+        self._build_index()
+
+    def mark_failed(self):
+        """Record a refresh that fetched nothing, so is_stale backs off before the next one."""
+        self.failed_at = self._clock()
+
+    def is_stale(self, max_age=SCHEDULE_MAX_AGE, retry_after=SCHEDULE_RETRY_AFTER):
+        """
+        True if the schedule was never fetched or was fetched more than max_age
+        seconds ago, unless a refresh failed less than retry_after seconds ago.
+        """
+        if self.failed_at is not None and self._clock() - self.failed_at < retry_after:
+            return False
+        return self.updated_at is None or self._clock() - self.updated_at > max_age
+
+    def save(self, path=DEFAULT_SCHEDULE_PATH):
+        """Atomically write the schedule to a JSON file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'updated_at': self.updated_at,
+                       'games': sorted(self.games.values(), key=lambda game: (game['date'], game['game_id']))}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_SCHEDULE_PATH):
+        """Load a saved schedule, or an empty one if the file does not exist."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['games'], data.get('updated_at'))
+
+
+_schedule = None
+_schedule_path = DEFAULT_SCHEDULE_PATH
+
+
+def configure_schedule(path=DEFAULT_SCHEDULE_PATH):
+    """Point the shared schedule at another file; it is loaded on first use."""
+    global _schedule, _schedule_path
+    _schedule = None
+    _schedule_path = path
+
+
+def get_schedule():
+    """Return the shared schedule, loading it on first use."""
+    global _schedule
+    if _schedule is None:
+        _schedule = Schedule.load(_schedule_path)
+    return _schedule
+
+
+def save_schedule():
+    """Save the shared schedule to its configured file."""
+    get_schedule().save(_schedule_path)
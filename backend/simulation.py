@@ -0,0 +1,159 @@
+"""
+Monte Carlo Outcome Simulation
+------------------------------
+Draws thousands of simulated stat lines per player from each player's own
+game log, for a whole slate in one NumPy operation. Every simulated game
+resamples one of the player's past games (so PTS, REB and AST keep their
+correlation) and shifts it by the gap between the model's expected value and
+the player's historical mean.
+
+The samples are summarized as percentiles, over/under probabilities for
+betting lines, and a risk level derived from the spread of the player's
+combined PTS+REB+AST.
+"""
+
+import json
+from collections import namedtuple
+
+DEFAULT_SIMULATIONS = 10000
+PERCENTILES = (10, 25, 50, 75, 90)
+# Coefficient of variation of PTS+REB+AST at which risk becomes "médio" / "alto"
+RISK_MEDIUM_CV = 0.25
+RISK_HIGH_CV = 0.40
+
+GameHistory = namedtuple("GameHistory", ["player_ids", "values", "counts"])
+Simulation = namedtuple("Simulation", ["player_ids", "samples", "stats"])
+
+
+def game_history(logs, player_ids, stats=None):
+    """
+    Stack the game logs of many players into a padded array.
+
+    Returns a GameHistory whose `values` is a float32 array of shape
+    (players, max games, stats), in the order of `player_ids`, and `counts`
+    the number of games of each player.
+    """
+    import numpy as np
+    import pandas as pd
+    from features import prepare_game_logs, STATS
+
+    stats = STATS if stats is None else stats
+    index = pd.Index(pd.unique(pd.Series(player_ids)))
+    if len(logs):
+        df = prepare_game_logs(logs)
+        rows = index.get_indexer(df['PLAYER_ID'])
+        df = df[rows >= 0]
+        rows = rows[rows >= 0]
+        position = df.groupby('PLAYER_ID', sort=False).cumcount().to_numpy()
+        counts = np.bincount(rows, minlength=len(index))
+    else:
+        df = pd.DataFrame(columns=stats)
+        rows = position = np.zeros(0, dtype=int)
+        counts = np.zeros(len(index), dtype=int)
+
+    values = np.zeros((len(index), max(int(counts.max(initial=0)), 1), len(stats)), dtype=np.float32)
+    values[rows, position] = df[stats].to_numpy(dtype=np.float32)
+    return GameHistory(index.tolist(), values, counts)
+
+
+def simulate(history, expected, n_sims=DEFAULT_SIMULATIONS, seed=None, stats=None):
+    """
+    Simulate `n_sims` games for every player at once.
+
+    `expected` is a (players, stats) array of expected values in the order
+    of `history.player_ids`. Players with no games simulate to their
+    expected values. Returns a Simulation whose `samples` has shape
+    (players, stats, n_sims); index k of the last axis is the same simulated
+    game for every stat.
+    """
+    import numpy as np
+    from features import STATS
+
+    stats = STATS if stats is None else stats
+    rng = np.random.default_rng(seed)
+    counts = history.counts
+    n_players = len(counts)
+
+    means = history.values.sum(axis=1) / np.maximum(counts, 1)[:, None]
+    shift = np.asarray(expected, dtype=np.float32) - means
+
+    draws = (rng.random((n_players, n_sims), dtype=np.float32) * counts[:, None]).astype(np.intp)
+    np.minimum(draws, np.maximum(counts - 1, 0)[:, None], out=draws)
+    games = np.ascontiguousarray(history.values.transpose(0, 2, 1))
+    samples = np.take_along_axis(games, draws[:, None, :], axis=2)
+    samples += shift[:, :, None].astype(np.float32)
+    np.maximum(samples, 0, out=samples)
+    return Simulation(history.player_ids, samples, list(stats))
+
+
+def risk_levels(samples):
+    """Risk label of each player from the coefficient of variation of PTS+REB+AST."""
+    import numpy as np
+
+    total = samples.sum(axis=1)
+    mean = total.mean(axis=1)
+    cv = np.divide(total.std(axis=1), mean, out=np.zeros_like(mean), where=mean > 0)
+    return np.where(cv >= RISK_HIGH_CV, "alto", np.where(cv >= RISK_MEDIUM_CV, "médio", "baixo")), cv
+
+
+def sorted_percentiles(ordered, percentiles):
+    """
+    Percentiles along the last axis of an already sorted array, with the
+    same linear interpolation as np.percentile but without re-sorting.
+    """
+    import numpy as np
+
+    positions = np.asarray(percentiles, dtype=np.float64) / 100 * (ordered.shape[-1] - 1)
+    low = np.floor(positions).astype(np.intp)
+    high = np.minimum(low + 1, ordered.shape[-1] - 1)
+    weight = (positions - low).astype(ordered.dtype)
+    return ordered[..., low] * (1 - weight) + ordered[..., high] * weight
+
+
+def load_lines(path):
+    """
+    Load betting lines from a JSON file mapping player ID to lines per stat,
+    e.g. {"2544": {"PTS": 24.5, "REB": 7.5, "AST": 8.5}}.
+    """
+    with open(path) as f:
+        return {int(player_id): lines for player_id, lines in json.load(f).items()}
+
+
+def summarize(simulation, lines=None, percentiles=PERCENTILES):
+    """
+    Summarize a simulation per player.
+
+    Returns a dict keyed by player ID with, for each stat, the mean, standard
+    deviation and percentiles of the simulated values and, when `lines` has a
+    line for it, the line and the probabilities of going over and under it.
+    Each player also gets a `risk` level and the `cv` it was derived from.
+    """
+    import numpy as np
+
+    samples = simulation.samples
+    lines = lines or {}
+    line_matrix = np.array([[lines.get(player_id, {}).get(stat, np.nan) for stat in simulation.stats]
+                            for player_id in simulation.player_ids], dtype=np.float32).reshape(samples.shape[:2])
+    over = (samples > line_matrix[:, :, None]).mean(axis=2)
+    under = (samples < line_matrix[:, :, None]).mean(axis=2)
+    means = samples.mean(axis=2)
+    stds = samples.std(axis=2)
+    risks, cvs = risk_levels(samples)
+    quantiles = sorted_percentiles(np.sort(samples, axis=2), percentiles)
+
+    summaries = {}
+    for i, player_id in enumerate(simulation.player_ids):
+        summary = {'risk': str(risks[i]), 'cv': round(float(cvs[i]), 3)}
+        for j, stat in enumerate(simulation.stats):
+            stat_summary = {
+                'mean': round(float(means[i, j]), 1),
+                'std': round(float(stds[i, j]), 1),
+                'percentiles': {f"p{p}": round(float(quantiles[i, j, k]), 1) for k, p in enumerate(percentiles)},
+            }
+            if not np.isnan(line_matrix[i, j]):
+                stat_summary['line'] = float(line_matrix[i, j])
+                stat_summary['over'] = round(float(over[i, j]), 3)
+                stat_summary['under'] = round(float(under[i, j]), 3)
+            summary[stat] = stat_summary
+        summaries[player_id] = summary
+    return summaries